@@ -0,0 +1,162 @@
+"""
+JSON 编解码基准测试
+使用与接口响应结构一致的合成数据（主页资料、战绩列表、战力历史），对比：
+- 解码：json_codec.loads(bytes) 与原来的 text() + json.loads
+- 编码：json_codec 紧凑格式与原来的 json.dumps(indent=2)
+
+用法（在插件根目录执行）：
+    python benchmarks/bench_json_codec.py [--rounds 200] [--stdlib]
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load_codec():
+    """直接加载 core/json_codec.py，不导入依赖 AstrBot 的 core 包"""
+    spec = importlib.util.spec_from_file_location("json_codec", ROOT / "core" / "json_codec.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+json_codec = _load_codec()
+
+
+# ========== 合成数据 ==========
+
+def make_profile(rng: random.Random) -> dict:
+    """主页资料（/game/koh/profile），多角色、完整的 head.mods"""
+    roles = [
+        {
+            "roleId": str(rng.randrange(10 ** 9)),
+            "roleName": f"玩家{i}号",
+            "roleJobName": "最强王者",
+            "shortRoleJobName": "王者",
+            "serverName": f"微信{rng.randrange(1, 500)}区",
+            "areaName": "安卓微信",
+            "gameOnline": rng.choice([0, 1, 2]),
+            "onlineTime": 1760000000 + rng.randrange(10 ** 6),
+            "offlineTime": 1760000000 + rng.randrange(10 ** 6),
+            "roleIcon": f"https://game.gtimg.cn/images/yxzj/img201606/heroimg/{rng.randrange(100, 600)}/{rng.randrange(100, 600)}.jpg",
+            "roleBigIcon": f"https://game.gtimg.cn/images/yxzj/img201606/skin/hero-info/{rng.randrange(100, 600)}/big.jpg"
+        }
+        for i in range(8)
+    ]
+    mods = [
+        {
+            "modId": mod_id,
+            "name": f"模块{mod_id}",
+            "content": str(rng.randrange(10 ** 5)),
+            "stype": rng.choice([0, 1]),
+            "icon": f"https://camp.qq.com/static/icon/{mod_id}.png",
+            "param1": json.dumps({"rankingStar": rng.randrange(100), "starImg": "https://camp.qq.com/static/star.png"}),
+            "param2": "",
+            "jumpUrl": f"https://camp.qq.com/jump?modId={mod_id}&roleId={roles[0]['roleId']}"
+        }
+        for mod_id in (304, 401, 402, 403, 404, 408, 409, 410, 501, 502, 701, 702, 703, 708, 709, 801, 802)
+    ]
+    return {"returnCode": 0, "result": 0, "returnMsg": "", "data": {"targetRoleId": roles[0]["roleId"], "roleList": roles, "head": {"mods": mods}}}
+
+
+def make_battle_list(rng: random.Random, count: int = 30) -> dict:
+    """战绩列表（/game/morebattlelist）"""
+    battles = []
+    for i in range(count):
+        battles.append({
+            "gameSeq": str(10 ** 9 + rng.randrange(10 ** 8)),
+            "gameSvrId": str(rng.randrange(10 ** 6)),
+            "relaySvrId": str(rng.randrange(10 ** 6)),
+            "gametime": f"2026-10-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+            "isWin": rng.choice([0, 1]),
+            "heroId": rng.randrange(100, 600),
+            "heroName": f"英雄{i}",
+            "heroIcon": f"https://game.gtimg.cn/images/yxzj/img201606/heroimg/{rng.randrange(100, 600)}/{rng.randrange(100, 600)}.jpg",
+            "killNum": rng.randrange(20),
+            "deadNum": rng.randrange(15),
+            "assistNum": rng.randrange(25),
+            "mapName": rng.choice(["王者峡谷 排位赛", "王者峡谷 匹配赛", "巅峰赛", "10v10 排位赛"]),
+            "score": round(rng.uniform(3, 16), 1),
+            "usedTime": rng.randrange(600, 1800),
+            "desc": ",".join(rng.sample(["MVP", "金牌", "银牌", "实力局", "翻盘局", "超神", "三杀"], 3)),
+            "battleType": rng.randrange(1, 5),
+            "evaluateUrlV3": f"https://camp.qq.com/static/evaluate/{rng.randrange(10)}.png",
+            "battleDetailUrl": f"https://camp.qq.com/battle?gameSeq={i}&toAppRoleId={rng.randrange(10 ** 9)}&gameSvrId=1&relaySvrId=2"
+        })
+    return {"returnCode": 0, "result": 0, "returnMsg": "", "data": {"list": battles, "hasMore": True}}
+
+
+def make_history(rng: random.Random, roles: int = 50, points: int = 200) -> dict:
+    """战力历史状态文件（profile_history.json）"""
+    history = {}
+    for r in range(roles):
+        series = [
+            [1760000000 + p * 3600, rng.randrange(10 ** 5), p, rng.randrange(100), round(rng.uniform(40, 60), 1), rng.randrange(100), None]
+            for p in range(points)
+        ]
+        history[str(10 ** 9 + r)] = {"camp_id": str(r), "name": f"玩家{r}", "raw": series[-168:], "daily": series[:-168]}
+    return history
+
+
+# ========== 计时 ==========
+
+def timeit(func, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    func()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def bench_decode(name: str, payload: dict, rounds: int):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    old = timeit(lambda: json.loads(body.decode("utf-8")), rounds)
+    new = timeit(lambda: json_codec.loads(body), rounds)
+    print(f"解码 {name:<10} {len(body) / 1024:8.1f} KB  text()+json.loads {old:7.3f} ms  json_codec.loads {new:7.3f} ms  x{old / new:.2f}")
+
+
+def bench_encode(name: str, obj: dict, rounds: int):
+    old_size = len(json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"))
+    new_size = len(json_codec.dumpb(obj))
+    old = timeit(lambda: json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"), rounds)
+    new = timeit(lambda: json_codec.dumpb(obj), rounds)
+    print(
+        f"编码 {name:<10} indent=2 {old:7.3f} ms / {old_size / 1024:8.1f} KB  "
+        f"紧凑 {new:7.3f} ms / {new_size / 1024:8.1f} KB  x{old / new:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 编解码基准测试")
+    parser.add_argument("--rounds", type=int, default=200, help="每项测试的重复次数")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument("--stdlib", action="store_true", help="已安装 orjson 时也强制使用标准库后端")
+    args = parser.parse_args()
+
+    if args.stdlib:
+        json_codec.orjson = None
+        json_codec.BACKEND = "json"
+
+    rng = random.Random(args.seed)
+    profile = make_profile(rng)
+    battles = make_battle_list(rng)
+    history = make_history(rng)
+
+    print(f"json_codec 后端: {json_codec.BACKEND}，重复 {args.rounds} 次")
+    bench_decode("主页资料", profile, args.rounds)
+    bench_decode("战绩列表", battles, args.rounds)
+    bench_encode("主页资料", profile, args.rounds)
+    bench_encode("战绩列表", battles, args.rounds)
+    bench_encode("战力历史", history, max(1, args.rounds // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+渲染基准测试
+使用合成的战绩列表和推送卡片数据，对比原生渲染（Pillow，进程池）与 html_render 的耗时和 CPU 开销。
+需在安装了 AstrBot 的环境中执行；HTML 渲染使用 AstrBot 配置的文转图服务，
+不可用时只测试原生渲染。HTML 渲染的 CPU 开销发生在浏览器进程中，这里只能统计本进程的部分。
+
+用法（在插件根目录执行）：
+    python benchmarks/bench_render.py [--rounds 20] [--concurrency 4] [--scale 2] [--font 字体路径]
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+# native_render 只依赖 Pillow 和 AstrBot 的 logger，直接导入，不经过依赖完整插件的 core 包
+sys.path.insert(0, str(ROOT / "core"))
+
+import native_render  # noqa: E402
+
+
+TEMPLATES = {
+    "battle_list": "battle_list.html",
+    "battle_push": "battle_push.html"
+}
+
+
+# ========== 合成数据 ==========
+
+def make_battle_list(rng: random.Random, icon: str, rows: int) -> dict:
+    """一页战绩列表的模板数据（与 GameStatsQuery._build_battle_page 一致）"""
+    tags = ["MVP", "金牌", "银牌", "三杀", "超神"] + list(native_render.SPECIAL_TAGS)
+    return {
+        "data": [
+            {
+                "index": i + 1,
+                "gameType": rng.choice(["王者峡谷 排位赛", "王者峡谷 匹配赛", "巅峰赛"]),
+                "gameTime": f"10-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}",
+                "gameDuration": f"{rng.randrange(10, 30)}分{rng.randrange(60)}秒",
+                "gameResult": rng.choice(["胜利", "失败"]),
+                "killCnt": rng.randrange(20),
+                "deadCnt": rng.randrange(15),
+                "assistCnt": rng.randrange(25),
+                "heroIcon": icon,
+                "tags": rng.sample(tags, 3),
+                "gradeGame": round(rng.uniform(3, 16), 1)
+            }
+            for i in range(rows)
+        ],
+        "dataTime": "实时",
+        "page": 1,
+        "totalPages": 3,
+        "bgUrl": "",
+        "logoUrl": ""
+    }
+
+
+def make_battle_push(rng: random.Random, icon: str, players: int) -> dict:
+    """推送卡片的模板数据（与 BattlePushManager._render_match_card 一致）"""
+    return {
+        "mapName": "王者峡谷 排位赛",
+        "gameTime": "2026-10-19 20:15:00",
+        "duration": "18分24秒",
+        "players": [
+            {
+                "name": f"玩家{i}",
+                "isWin": True,
+                "heroName": f"英雄{i}",
+                "heroIcon": icon,
+                "kda": f"{rng.randrange(20)}/{rng.randrange(10)}/{rng.randrange(20)}",
+                "score": round(rng.uniform(3, 16), 1),
+                "tags": ["MVP", "实力局"]
+            }
+            for i in range(players)
+        ],
+        "detail": {"name": "玩家0", "totalMoney": 13520, "hurt": 98213, "hurtTaken": 45120}
+    }
+
+
+# ========== 渲染 ==========
+
+async def run_rounds(render, rounds: int, concurrency: int):
+    """以给定并发执行 rounds 次渲染，返回 (每次耗时列表, 每次 CPU 耗时列表, 总耗时)"""
+    # 预热一次，不计入进程池和浏览器的启动耗时
+    await render()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, cpu_times = [], []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            cpu = await render()
+            latencies.append(time.perf_counter() - started)
+            cpu_times.append(cpu)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(rounds)))
+    return latencies, cpu_times, time.perf_counter() - started
+
+
+def report(engine: str, label: str, latencies, cpu_times, total: float):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{engine:<6} {label:<12} p50 {statistics.median(latencies) * 1000:8.1f} ms  "
+        f"p95 {p95 * 1000:8.1f} ms  CPU {statistics.mean(cpu_times) * 1000:8.1f} ms/张  "
+        f"吞吐 {len(latencies) / total:6.2f} 张/秒"
+    )
+
+
+async def load_html_renderer():
+    """获取并初始化 AstrBot 的文转图渲染器，不可用时返回 None"""
+    try:
+        from astrbot.core import html_renderer
+        initialize = getattr(html_renderer, "initialize", None)
+        if initialize:
+            await initialize()
+        return html_renderer
+    except Exception as e:
+        print(f"跳过 HTML 渲染（AstrBot 渲染器不可用: {e}）")
+        return None
+
+
+async def bench(args):
+    rng = random.Random(args.seed)
+    icon = str(ROOT / "assets" / "modePeakRace-avatar.png")
+    datasets = {
+        "battle_list": make_battle_list(rng, icon, args.rows),
+        "battle_push": make_battle_push(rng, icon, args.players)
+    }
+    options = {"full_page": True, "timeout": 30000, "device_scale_factor": args.scale, "quality": args.quality}
+
+    out_dir = Path(tempfile.mkdtemp(prefix="gok_bench_"))
+    renderer = native_render.NativeRenderer(list(TEMPLATES), out_dir, font_path=args.font, workers=args.workers)
+    try:
+        html_renderer = await load_html_renderer()
+        print(f"重复 {args.rounds} 次，并发 {args.concurrency}，render_scale {args.scale}，quality {args.quality}")
+
+        for label, template_name in TEMPLATES.items():
+            data = datasets[label]
+            if renderer.supports(label):
+                async def native():
+                    path, cpu_time = await renderer.render(label, data, options)
+                    Path(path).unlink()
+                    return cpu_time
+
+                report("原生", label, *await run_rounds(native, args.rounds, args.concurrency))
+            else:
+                print(f"跳过原生渲染 {label}（未安装 Pillow 或找不到中文字体，可用 --font 指定）")
+
+            if html_renderer is not None:
+                template = (ROOT / "templates" / template_name).read_text(encoding="utf-8")
+
+                async def html():
+                    cpu_started = time.process_time()
+                    path = await html_renderer.render_custom_template(template, data, return_url=False, options=options)
+                    Path(path).unlink(missing_ok=True)
+                    return time.process_time() - cpu_started
+
+                try:
+                    report("HTML", label, *await run_rounds(html, args.rounds, args.concurrency))
+                except Exception as e:
+                    print(f"HTML 渲染 {label} 失败: {e}")
+    finally:
+        renderer.shutdown(wait=True)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="原生渲染与 HTML 渲染基准测试")
+    parser.add_argument("--rounds", type=int, default=20, help="每个模板的渲染次数")
+    parser.add_argument("--concurrency", type=int, default=2, help="同时进行的渲染数")
+    parser.add_argument("--workers", type=int, default=2, help="原生渲染进程数")
+    parser.add_argument("--scale", type=int, default=2, help="render_scale")
+    parser.add_argument("--quality", type=int, default=100, help="render_quality")
+    parser.add_argument("--rows", type=int, default=10, help="战绩列表的行数")
+    parser.add_argument("--players", type=int, default=2, help="推送卡片的玩家数")
+    parser.add_argument("--font", default="", help="中文字体路径，默认自动查找")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+多实例协调检查
+启动多个进程共用同一个协调数据库，按战绩推送的方式（心跳、一致性哈希筛选、获取租约）轮询合成的营地ID，检查：
+- 稳定后每个营地ID只由一个进程轮询
+- 强制结束一个进程（不主动退出集群）后，其负责的营地ID在心跳超时后由存活的进程接管
+需在安装了 AstrBot 的环境中执行（协调器使用 AstrBot 的 logger）
+
+用法（在插件根目录执行）：
+    python benchmarks/check_multi_worker.py [--workers 3] [--camps 30] [--ttl 3] [--interval 0.5]
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import queue
+import shutil
+import sys
+import tempfile
+import time
+import types
+from collections import defaultdict
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load_coordinator():
+    """只加载 core/worker_coordinator.py 及其依赖的 json_codec，不执行导入整个插件的 core/__init__.py"""
+    package = types.ModuleType("gok_core")
+    package.__path__ = [str(ROOT / "core")]
+    sys.modules.setdefault("gok_core", package)
+    return importlib.import_module("gok_core.worker_coordinator")
+
+
+def run_worker(db_path: str, worker_id: str, camp_ids, ttl: int, interval: float, polls, stop):
+    """模拟一个推送进程：每轮上报心跳、筛选本进程负责的营地ID，获取到租约后记为一次轮询"""
+    worker_coordinator = _load_coordinator()
+    coordinator = worker_coordinator.WorkerCoordinator(Path(db_path), worker_id=worker_id, heartbeat_ttl=ttl)
+    while not stop.is_set():
+        coordinator.heartbeat()
+        for camp_id in coordinator.owned(camp_ids):
+            if coordinator.acquire_lease(camp_id, ttl=interval * 2):
+                polls.put((time.time(), worker_id, camp_id))
+        time.sleep(interval)
+    coordinator.leave()
+
+
+def drain(polls, records):
+    """取出子进程上报的轮询记录"""
+    while True:
+        try:
+            records.append(polls.get_nowait())
+        except queue.Empty:
+            return
+
+
+def owners_between(records, start: float, end: float):
+    """统计时间段内每个营地ID的轮询进程"""
+    owners = defaultdict(set)
+    for at, worker_id, camp_id in records:
+        if start <= at < end:
+            owners[camp_id].add(worker_id)
+    return owners
+
+
+def check_window(label: str, owners, camp_ids, alive) -> bool:
+    """检查时间段内每个营地ID都恰好由一个存活进程轮询"""
+    missing = [camp_id for camp_id in camp_ids if not owners.get(camp_id)]
+    shared = {camp_id: sorted(workers) for camp_id, workers in owners.items() if len(workers) > 1}
+    dead = {camp_id: sorted(workers - alive) for camp_id, workers in owners.items() if workers - alive}
+    ok = not missing and not shared and not dead
+    print(f"{label}: {'通过' if ok else '失败'}")
+    if missing:
+        print(f"  未被轮询的营地ID: {missing}")
+    if shared:
+        print(f"  被多个进程轮询的营地ID: {shared}")
+    if dead:
+        print(f"  仍由已结束进程轮询的营地ID: {dead}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多实例协调检查")
+    parser.add_argument("--workers", type=int, default=3, help="进程数（至少 2）")
+    parser.add_argument("--camps", type=int, default=30, help="营地ID数量")
+    parser.add_argument("--ttl", type=int, default=3, help="心跳超时（秒）")
+    parser.add_argument("--interval", type=float, default=0.5, help="轮询间隔（秒）")
+    args = parser.parse_args()
+
+    workers = max(2, args.workers)
+    camp_ids = [str(10 ** 8 + i) for i in range(args.camps)]
+    window = max(args.interval * 4, 2.0)
+    tmp_dir = Path(tempfile.mkdtemp(prefix="gok_workers_"))
+    context = multiprocessing.get_context("spawn")
+    polls, stop = context.Queue(), context.Event()
+    processes = {
+        f"worker-{i}": context.Process(
+            target=run_worker,
+            args=(str(tmp_dir / "workers.db"), f"worker-{i}", camp_ids, args.ttl, args.interval, polls, stop)
+        )
+        for i in range(workers)
+    }
+    records = []
+    try:
+        for process in processes.values():
+            process.start()
+
+        # 等待所有进程上报心跳、哈希环稳定，且启动阶段的租约到期
+        time.sleep(args.ttl + args.interval * 4)
+        started = time.time()
+        time.sleep(window)
+        drain(polls, records)
+        before = owners_between(records, started, time.time())
+        ok = check_window("稳定后每个营地ID只由一个进程轮询", before, camp_ids, set(processes))
+
+        # 强制结束一个进程，模拟崩溃（不释放租约、不删除心跳记录）
+        victim = "worker-0"
+        processes[victim].kill()
+        processes[victim].join()
+        killed_at = time.time()
+        victim_camps = sorted(camp_id for camp_id, owners in before.items() if victim in owners)
+        print(f"已结束 {victim}，其负责 {len(victim_camps)} 个营地ID")
+
+        time.sleep(args.ttl + args.interval * 4)
+        started = time.time()
+        time.sleep(window)
+        drain(polls, records)
+        after = owners_between(records, started, time.time())
+        alive = set(processes) - {victim}
+        ok = check_window("进程结束后由存活进程接管", after, camp_ids, alive) and ok
+
+        takeover = [
+            min((at for at, worker_id, camp_id in records if camp_id == camp and at > killed_at and worker_id != victim), default=None)
+            for camp in victim_camps
+        ]
+        if victim_camps and all(at is not None for at in takeover):
+            print(f"接管耗时: 最长 {max(takeover) - killed_at:.1f}秒（心跳超时 {args.ttl}秒）")
+    finally:
+        stop.set()
+        for process in processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
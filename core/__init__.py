@@ -2,12 +2,16 @@ from .account_manager import AccountManager
 from .api_service import ApiService
 from .battle_push import BattlePushManager
 from .game_stats import GameStatsQuery
+from .group_rank import GroupRankQuery
 from .hero_query import HeroQuery
+from .profile_history import ProfileHistory
 
 __all__ = [
     'AccountManager',
     'ApiService',
     'BattlePushManager',
     'GameStatsQuery',
-    'HeroQuery'
+    'GroupRankQuery',
+    'HeroQuery',
+    'ProfileHistory'
 ]
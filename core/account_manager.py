@@ -3,11 +3,11 @@
 处理营地ID的绑定、切换、删除等操作
 """
 
-import json
 import os
 from pathlib import Path
 from typing import Optional, Dict, List
 from astrbot.api import logger
+from . import json_codec
 
 
 class AccountManager:
@@ -16,10 +16,13 @@ class AccountManager:
     def __init__(self, data_dir: Path):
         self.data_file = data_dir / "user_data.json"
         self.role_selection_file = data_dir / "role_selection.json"
+        self.group_members_file = data_dir / "group_members.json"
         self.user_data: Dict[str, Dict] = {}
         self.role_selections: Dict[str, str] = {}  # user_id -> selected_role_id
+        self.group_members: Dict[str, List[str]] = {}  # group_id -> [user_id]
         self._load_data()
         self._load_role_selections()
+        self._load_group_members()
 
     def _load_data(self):
         """加载用户数据"""
@@ -28,8 +31,7 @@ class AccountManager:
             return
         
         try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                self.user_data = json.load(f)
+            self.user_data = json_codec.load_file(self.data_file)
         except Exception as e:
             logger.error(f"加载用户数据失败: {e}")
             self.user_data = {}
@@ -37,8 +39,7 @@ class AccountManager:
     def _save_data(self):
         """保存用户数据"""
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(self.user_data, f, ensure_ascii=False, indent=2)
+        json_codec.dump_file(self.user_data, self.data_file)
 
     def _get_user_info(self, user_id: str) -> Dict:
         """获取用户信息"""
@@ -131,6 +132,11 @@ class AccountManager:
         logger.debug(f"用户 {user_id} 当前使用ID: {current_id}")
         return current_id
 
+    def get_ids(self, user_id: str) -> List[str]:
+        """获取用户绑定的全部ID"""
+        user_id = str(user_id)
+        return [str(camp_id) for camp_id in self.user_data.get(user_id, {}).get("ids", [])]
+
     def _format_id_list(self, user_info: Dict) -> str:
         """格式化ID列表显示"""
         lines = []
@@ -146,8 +152,7 @@ class AccountManager:
             return
         
         try:
-            with open(self.role_selection_file, "r", encoding="utf-8") as f:
-                self.role_selections = json.load(f)
+            self.role_selections = json_codec.load_file(self.role_selection_file)
         except Exception as e:
             logger.error(f"加载角色选择数据失败: {e}")
             self.role_selections = {}
@@ -155,8 +160,7 @@ class AccountManager:
     def _save_role_selections(self):
         """保存角色选择数据"""
         try:
-            with open(self.role_selection_file, "w", encoding="utf-8") as f:
-                json.dump(self.role_selections, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(self.role_selections, self.role_selection_file)
         except Exception as e:
             logger.error(f"保存角色选择数据失败: {e}")
     
@@ -179,3 +183,38 @@ class AccountManager:
             del self.role_selections[user_id]
             self._save_role_selections()
             logger.info(f"清除用户 {user_id} 的角色选择")
+    
+    def _load_group_members(self):
+        """加载群成员数据"""
+        if not os.path.exists(self.group_members_file):
+            return
+        
+        try:
+            self.group_members = json_codec.load_file(self.group_members_file)
+        except Exception as e:
+            logger.error(f"加载群成员数据失败: {e}")
+            self.group_members = {}
+    
+    def _save_group_members(self):
+        """保存群成员数据"""
+        try:
+            json_codec.dump_file(self.group_members, self.group_members_file)
+        except Exception as e:
+            logger.error(f"保存群成员数据失败: {e}")
+    
+    def add_group_member(self, group_id: str, user_id: str):
+        """记录在群内使用过插件的用户"""
+        group_id, user_id = str(group_id), str(user_id)
+        members = self.group_members.setdefault(group_id, [])
+        if user_id not in members:
+            members.append(user_id)
+            self._save_group_members()
+    
+    def get_group_camp_ids(self, group_id: str) -> Dict[str, str]:
+        """获取群内已绑定用户当前使用的营地ID: camp_id -> user_id"""
+        camp_ids = {}
+        for user_id in self.group_members.get(str(group_id), []):
+            camp_id = self.get_current_id(user_id)
+            if camp_id:
+                camp_ids.setdefault(camp_id, user_id)
+        return camp_ids
@@ -8,8 +8,23 @@ import time
 import re
 import aiohttp
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from astrbot.api import logger
+from . import json_codec
+from .models import Battle, Profile
+from .swr_cache import StaleWhileRevalidate
+
+
+# 解码后的模型缓存，所有 ApiService 实例共享: 营地ID -> Profile / (获取时间, 战绩列表)
+_profile_cache: Dict[str, Profile] = {}
+_battle_cache: Dict[str, tuple] = {}
+
+# 对局详情缓存: 对局标识_角色ID -> 详情数据（对局结束后不再变化，仅限制条数）
+_detail_cache: Dict[str, Dict[str, Any]] = {}
+DETAIL_CACHE_SIZE = 256
+
+# 查询指令使用的过期缓存复用策略
+_swr = StaleWhileRevalidate()
 
 
 class ApiService:
@@ -151,7 +166,7 @@ class ApiService:
         
         for i in range(retries):
             try:
-                body_str = json.dumps(body) if body else None
+                body_str = json_codec.dumps(body) if body else None
                 
                 async with aiohttp.ClientSession() as session:
                     async with session.request(
@@ -166,9 +181,9 @@ class ApiService:
                             logger.error(f"HTTP错误 {response.status}: {error_text[:200]}")
                             raise Exception(f"HTTP {response.status}: {error_text[:100]}")
                         
-
-                        text = await response.text()
-                        return json.loads(text)
+                        # 直接从响应 bytes 解码，避免 bytes -> str -> 对象 的二次解码
+                        raw = await response.read()
+                        return json_codec.loads(raw)
             except Exception as e:
                 if i == retries - 1:
                     logger.error(f"API请求失败: {e}, URL: {url}")
@@ -249,6 +264,145 @@ class ApiService:
             logger.error(f"获取用户资料异常: {e}", exc_info=True)
             return {"code": -1, "msg": str(e)}
 
+    async def fetch_profile(self, user_id: str, max_age: float = 30) -> Profile:
+        """获取解码后的用户资料，max_age 秒内的缓存直接复用"""
+        user_id = str(user_id)
+        cached = _profile_cache.get(user_id)
+        if cached and time.time() - cached.fetched_at <= max_age:
+            logger.debug(f"使用缓存的用户资料，ID: {user_id}")
+            return cached
+        
+        profile = Profile(await self.get_profile(user_id))
+        if profile.ok:
+            _profile_cache[user_id] = profile
+        return profile
+
+    async def fetch_profile_swr(
+        self,
+        user_id: str,
+        revalidate_ttl: float = 300,
+        max_stale: float = 3600
+    ) -> Profile:
+        """获取用户资料，稍旧的缓存先返回并在后台刷新，接口异常时回退到 max_stale 内的旧缓存"""
+        user_id = str(user_id)
+        
+        def peek():
+            cached = _profile_cache.get(user_id)
+            return (cached.fetched_at, cached) if cached else None
+        
+        profile, _ = await _swr.get(
+            f"profile:{user_id}",
+            peek,
+            lambda: self.fetch_profile(user_id, max_age=0),
+            lambda profile: profile.ok and profile.return_code != -30107,
+            revalidate_ttl=revalidate_ttl,
+            max_stale=max_stale
+        )
+        return profile
+
+    async def fetch_battles_swr(
+        self,
+        user_id: str,
+        revalidate_ttl: float = 300,
+        max_stale: float = 3600
+    ) -> Tuple[List[Battle], float]:
+        """获取战绩列表及其获取时间，缓存策略同 fetch_profile_swr"""
+        user_id = str(user_id)
+        return await _swr.get(
+            f"battles:{user_id}",
+            lambda: _battle_cache.get(user_id),
+            lambda: self.fetch_battles(user_id, max_age=0),
+            bool,
+            revalidate_ttl=revalidate_ttl,
+            max_stale=max_stale
+        )
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """获取过期缓存复用的统计"""
+        return dict(_swr.stats)
+
+    async def fetch_profiles(
+        self,
+        user_ids: List[str],
+        concurrency: int = 4,
+        max_age: float = 300
+    ) -> Dict[str, Profile]:
+        """并发获取多个用户的资料（限制并发数，复用缓存），失败的用户不包含在结果中"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def fetch(user_id: str):
+            async with semaphore:
+                try:
+                    return user_id, await self.fetch_profile(user_id, max_age=max_age)
+                except Exception as e:
+                    logger.warning(f"获取用户资料失败，ID: {user_id}, 错误: {e}")
+                    return user_id, None
+        
+        results = await asyncio.gather(*(fetch(str(user_id)) for user_id in user_ids))
+        return {user_id: profile for user_id, profile in results if profile and profile.ok}
+
+    async def fetch_battle_lists(
+        self,
+        user_ids: List[str],
+        concurrency: int = 4,
+        max_age: float = 30
+    ) -> Dict[str, List[Battle]]:
+        """并发获取多个用户的战绩列表（限制并发数，复用缓存），失败的用户不包含在结果中"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def fetch(user_id: str):
+            async with semaphore:
+                try:
+                    return user_id, await self.fetch_battles(user_id, max_age=max_age)
+                except Exception as e:
+                    logger.warning(f"获取战绩列表失败，ID: {user_id}, 错误: {e}")
+                    return user_id, None
+        
+        results = await asyncio.gather(*(fetch(str(user_id)) for user_id in user_ids))
+        return {user_id: battles for user_id, battles in results if battles}
+
+    def peek_profile(self, user_id: str, max_age: float = 600) -> Optional[Profile]:
+        """读取缓存中的用户资料，不发起请求"""
+        cached = _profile_cache.get(str(user_id))
+        if cached and time.time() - cached.fetched_at <= max_age:
+            return cached
+        return None
+
+    async def fetch_battles(self, user_id: str, max_age: float = 30) -> List[Battle]:
+        """获取解码后的战绩列表，max_age 秒内的缓存直接复用"""
+        user_id = str(user_id)
+        cached = _battle_cache.get(user_id)
+        if cached and time.time() - cached[0] <= max_age:
+            logger.debug(f"使用缓存的战绩列表，ID: {user_id}")
+            return cached[1]
+        
+        battles = Battle.list_from_response(await self.get_more_battle_list(user_id))
+        if battles:
+            _battle_cache[user_id] = (time.time(), battles)
+        return battles
+
+    async def fetch_battle_detail(self, user_id: str, battle: Battle) -> Dict[str, Any]:
+        """获取对局详情（以战绩所属角色为视角），同一对局同一视角只请求一次"""
+        key = f"{battle.match_key}_{battle.target_role_id}"
+        cached = _detail_cache.get(key)
+        if cached is not None:
+            logger.debug(f"使用缓存的对局详情，对局: {key}")
+            return cached
+        
+        detail = await self.get_battle_detail(
+            user_id,
+            battle.get("battleType"),
+            battle.get("gameSvrId"),
+            battle.get("relaySvrId"),
+            battle.target_role_id,
+            battle.game_seq
+        )
+        if detail.get("data"):
+            if len(_detail_cache) >= DETAIL_CACHE_SIZE:
+                _detail_cache.pop(next(iter(_detail_cache)))
+            _detail_cache[key] = detail
+        return detail
+
     async def get_season_page(self, user_id: str) -> Dict[str, Any]:
         """获取赛季页面数据"""
         return await self._make_auth_request("/game/seasonpage", {
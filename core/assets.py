@@ -0,0 +1,245 @@
+"""
+静态资源模块
+启动时一次性读取 assets 目录中的图片并编码，模板渲染时直接取用缓存的
+data URI 或本地文件地址，单次请求不再读取和编码图片；
+安装 Pillow 时按 render_scale 生成缩小并重新压缩的版本，缓存在磁盘上
+"""
+
+import base64
+import fnmatch
+import math
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from astrbot.api import logger
+
+try:
+    from PIL import Image, features
+except ImportError:  # pragma: no cover - 可选依赖
+    Image = None
+
+
+# 部分系统（如 Windows、精简镜像）的 mimetypes 未登记 webp，data URI 会退化为 application/octet-stream
+mimetypes.add_type("image/webp", ".webp")
+
+
+# 资源查找目录（相对插件根目录），按顺序查找
+SEARCH_DIRS = ("assets", os.path.join("resources", "img"))
+
+# 资源引用方式: data_uri 内嵌到页面，file 使用本地文件地址（需渲染器可访问本地文件）
+ASSET_MODES = ("data_uri", "file")
+
+# 资源 -> (使用该资源的模板, 在模板中的最大显示宽度（CSS 像素）)，
+# 显示宽度乘以该模板 body 的 transform 缩放倍数和 render_scale 后即为所需的图片宽度
+DISPLAY_WIDTHS = {
+    "bgImgV2.png": ("homepage_full.html", 1050),
+    "flag*.png": ("homepage_full.html", 150),
+    "honor.png": ("homepage_full.html", 240),
+    "roleJob.png": ("homepage_full.html", 240),
+    "cube.png": ("homepage_full.html", 150),
+    "modePeakRace-avatar.png": ("homepage_full.html", 66),
+    "star.png": ("homepage_full.html", 20),
+}
+
+# 支持的 render_scale
+RENDER_SCALES = (1, 2, 3)
+
+# 模板 body 样式中的 transform: scale(N)
+BODY_SCALE_PATTERN = re.compile(r"\bbody\s*\{[^}]*?transform\s*:\s*scale\(\s*([\d.]+)", re.S)
+
+
+def _template_scale(path: Path) -> float:
+    """模板整体放大的倍数（body 的 transform 缩放倍数，未设置时为 1），资源实际显示宽度需乘以该倍数"""
+    scale = 1.0
+    try:
+        content = path.read_text(encoding="utf-8")
+    except OSError:
+        return scale
+    for match in BODY_SCALE_PATTERN.finditer(content):
+        try:
+            scale = max(scale, float(match.group(1)))
+        except ValueError:
+            pass
+    return scale
+
+
+def _display_width(name: str) -> Optional[Tuple[str, int]]:
+    """获取资源所在的模板和显示宽度，未登记的资源返回 None（不生成缩小版本）"""
+    for pattern, display in DISPLAY_WIDTHS.items():
+        if fnmatch.fnmatch(name, pattern):
+            return display
+    return None
+
+
+class AssetRegistry:
+    """静态资源注册表"""
+
+    def __init__(
+        self,
+        plugin_root: Path,
+        mode: str = "data_uri",
+        scale: int = 2,
+        cache_dir: Optional[Path] = None
+    ):
+        self.plugin_root = Path(plugin_root).resolve()
+        self.plugin_dir = str(self.plugin_root).replace("\\", "/")
+        self.mode = mode if mode in ASSET_MODES else "data_uri"
+        self.scale = scale
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        # 模板文件名 -> 模板整体放大的倍数
+        self._template_scales: Dict[str, float] = {}
+        self._paths: Dict[str, Optional[Path]] = {}
+        self._sources: Dict[str, str] = {}
+        # 引用地址 -> 标识（资源名、实际文件和修改时间），用于计算渲染缓存的键
+        self.source_keys: Dict[str, str] = {}
+
+    def preload(self):
+        """生成当前 render_scale 的缩小版本（已缓存的跳过），并预先读取编码所有资源"""
+        names = self._asset_names()
+        if Image is not None and self.cache_dir:
+            self.build_variants(names, scales=(self.scale,))
+
+        count = sum(1 for name in names if self.src(name))
+        logger.info(f"静态资源已加载: {count} 个，引用方式: {self.mode}，渲染倍率: {self.scale}")
+
+    def _asset_names(self) -> list:
+        """列出所有资源文件名"""
+        names = []
+        for search_dir in SEARCH_DIRS:
+            directory = self.plugin_root / search_dir
+            if not directory.is_dir():
+                continue
+            names.extend(path.name for path in sorted(directory.iterdir()) if path.is_file())
+        return list(dict.fromkeys(names))
+
+    def build_variants(self, names: Iterable[str], scales: Iterable[int] = RENDER_SCALES):
+        """为每个 render_scale 生成缩小并重新压缩的资源，源文件未更新时复用磁盘缓存"""
+        if Image is None:
+            logger.info("未安装 Pillow，跳过静态资源优化")
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        built = 0
+        for name in names:
+            source = self.find(name)
+            if source is None or _display_width(name) is None:
+                continue
+            for scale in scales:
+                try:
+                    if self._build_variant(source, scale):
+                        built += 1
+                except Exception as e:
+                    logger.warning(f"生成静态资源 {name}@{scale}x 失败，使用原图: {e}")
+        if built:
+            logger.info(f"已生成 {built} 个优化后的静态资源，缓存目录: {self.cache_dir}")
+
+    def _template_scale(self, template: str) -> float:
+        """获取模板整体放大的倍数（首次调用时读取模板并缓存）"""
+        if template not in self._template_scales:
+            self._template_scales[template] = _template_scale(self.plugin_root / "templates" / template)
+        return self._template_scales[template]
+
+    def _target_width(self, name: str, scale: int) -> int:
+        """资源在该 render_scale 下实际需要的像素宽度（按使用该资源的模板的缩放倍数计算）"""
+        template, width = _display_width(name)
+        return math.ceil(width * self._template_scale(template) * scale)
+
+    def _variant_stem(self, name: str, scale: int) -> str:
+        """缩小版本的文件名（不含扩展名），包含目标宽度，显示宽度变化后旧版本自然失效"""
+        return f"{Path(name).stem}@{self._target_width(name, scale)}w"
+
+    def _build_variant(self, source: Path, scale: int) -> bool:
+        """生成单个缩小版本，返回是否重新生成；既不需要缩小、重新压缩后也不比原图小时不生成"""
+        stem = self._variant_stem(source.name, scale)
+        source_mtime = source.stat().st_mtime
+        for existing in self.cache_dir.glob(f"{stem}.*"):
+            if existing.stat().st_mtime >= source_mtime:
+                return False
+            existing.unlink()
+        marker = self.cache_dir / f"{stem}.skip"
+        if marker.exists() and marker.stat().st_mtime >= source_mtime:
+            return False
+
+        with Image.open(source) as image:
+            # 原图不比实际显示宽度大时只重新压缩，不缩小；原图已是 WebP 时重新压缩没有收益
+            target_width = self._target_width(source.name, scale)
+            downscaled = image.width > target_width
+            if not downscaled and image.format == "WEBP":
+                marker.touch()
+                return False
+            image.load()
+            if downscaled:
+                height = max(1, round(image.height * target_width / image.width))
+                image = image.resize((target_width, height), Image.LANCZOS)
+
+            candidates = []
+            png_path = self.cache_dir / f"{stem}.png"
+            image.save(png_path, "PNG")
+            candidates.append(png_path)
+            if features.check("webp"):
+                webp_path = self.cache_dir / f"{stem}.webp"
+                # method=4 的体积与 6 相差不到 5%，耗时只有几十分之一
+                image.save(webp_path, "WEBP", quality=90, method=4)
+                candidates.append(webp_path)
+
+        best = min(candidates, key=lambda path: path.stat().st_size)
+        for path in candidates:
+            if path is not best:
+                path.unlink()
+        # 缩小后的图片即使体积未减小也保留，渲染时解码的像素更少
+        if not downscaled and best.stat().st_size >= source.stat().st_size:
+            best.unlink()
+            marker.touch()
+            return False
+        return True
+
+    def variant(self, name: str) -> Optional[Path]:
+        """获取当前 render_scale 对应的缩小版本路径，没有时返回 None"""
+        if not self.cache_dir or not self.cache_dir.is_dir() or _display_width(name) is None:
+            return None
+        stem = self._variant_stem(name, self.scale)
+        for suffix in (".webp", ".png"):
+            path = self.cache_dir / f"{stem}{suffix}"
+            if path.is_file():
+                return path
+        return None
+
+    def find(self, name: str) -> Optional[Path]:
+        """查找资源文件路径"""
+        if name not in self._paths:
+            self._paths[name] = next(
+                (
+                    self.plugin_root / search_dir / name
+                    for search_dir in SEARCH_DIRS
+                    if (self.plugin_root / search_dir / name).is_file()
+                ),
+                None
+            )
+        return self._paths[name]
+
+    def src(self, name: str) -> str:
+        """获取资源的引用地址（首次调用时编码并缓存），资源不存在时返回空字符串"""
+        source = self._sources.get(name)
+        if source is not None:
+            return source
+
+        path = self.variant(name) or self.find(name)
+        if path is None:
+            logger.warning(f"静态资源不存在: {name}")
+            source = ""
+        elif self.mode == "file":
+            source = path.as_uri()
+        else:
+            try:
+                mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                source = f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+            except OSError as e:
+                logger.error(f"读取静态资源失败 {name}: {e}")
+                source = ""
+
+        self._sources[name] = source
+        if source:
+            self.source_keys[source] = f"asset:{name}:{path.name}:{path.stat().st_mtime_ns}"
+        return source
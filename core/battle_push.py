@@ -3,15 +3,28 @@
 定时检查用户战绩变化，推送新战绩
 """
 import asyncio
-import json
+import math
+import random
+import sqlite3
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
-from .api_service import ApiService
+from . import json_codec
+from .api_service import api_service
+from .models import Battle
+from .push_delivery import PushDispatcher
+from .render_queue import PRIORITY_PUSH
+from .worker_coordinator import WorkerCoordinator
 
-api_service = ApiService()
+
+# 最近一场对局或离线时间在该时长内视为活跃（秒）
+ACTIVE_WINDOW = 30 * 60
+
+# 水位线中保留的最近战绩标识数量（大于单次返回的战绩条数）
+WATERMARK_SIZE = 60
 
 
 class BattlePushManager:
@@ -25,14 +38,50 @@ class BattlePushManager:
         self.last_battle_file = self.data_dir / "last_battle_record.json"
         self.push_config = self._load_push_config()
         self.last_battles = self._load_last_battles()
+        self.coordinator = self._create_coordinator()
+        if self.coordinator:
+            # 多实例模式下订阅配置保存在共享数据库中，首次启用时从本地文件导入
+            local_config = self.push_config
+            self.push_config = self.coordinator.update_state(
+                "push_config", lambda value: local_config if value is None else value
+            )
+        self.camp_index = self._build_camp_index()
+        self.cycle_stats: Dict = {}
+        self.poll_state: Dict[str, Dict] = {}  # camp_id -> {"level": 退避级数, "skip": 剩余跳过轮数, "at": 更新时间}
+        self._push_tasks = set()
+        self._pending_matches: Dict[str, Dict] = {}  # 对局标识 -> 待推送的对局（合并同一对局的多名玩家）
+        self.dispatcher = PushDispatcher(
+            self.plugin.context,
+            window=self._get_int_config("push_batch_window", 10, 0),
+            min_send_interval=self._get_int_config("push_min_send_interval", 5, 0)
+        )
         self.task = None
+        self.heartbeat_task = None
         
+    def _create_coordinator(self) -> Optional[WorkerCoordinator]:
+        """多实例模式下创建协调器"""
+        config = getattr(self.plugin, "config", None) or {}
+        if not config.get("multi_worker", False):
+            return None
+        
+        try:
+            heartbeat_ttl = int(config.get("worker_heartbeat_ttl", 90))
+        except (ValueError, TypeError):
+            heartbeat_ttl = 90
+        
+        coordinator = WorkerCoordinator(
+            self.data_dir / "workers.db",
+            worker_id=config.get("worker_id") or None,
+            heartbeat_ttl=max(10, heartbeat_ttl)
+        )
+        logger.info(f"战绩推送多实例模式已启用，当前进程: {coordinator.worker_id}")
+        return coordinator
+    
     def _load_push_config(self) -> Dict:
         """加载推送配置"""
         if self.push_config_file.exists():
             try:
-                with open(self.push_config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return json_codec.load_file(self.push_config_file)
             except Exception as e:
                 logger.error(f"加载推送配置失败: {e}")
         return {}
@@ -40,17 +89,48 @@ class BattlePushManager:
     def _save_push_config(self):
         """保存推送配置"""
         try:
-            with open(self.push_config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.push_config, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(self.push_config, self.push_config_file)
         except Exception as e:
             logger.error(f"保存推送配置失败: {e}")
     
+    async def _modify_push_config(self, change: Callable[[Dict], str]) -> str:
+        """修改推送配置并保存，返回 change 的结果
+        
+        多实例模式下在共享数据库的事务中读取、修改并写回（在线程中执行，不阻塞事件循环），
+        多个进程同时修改订阅时不会丢失更新
+        """
+        result = ""
+        
+        def apply(config: Optional[Dict]) -> Dict:
+            nonlocal result
+            config = config or {}
+            result = change(config)
+            return config
+        
+        if self.coordinator:
+            self.push_config = await asyncio.to_thread(self.coordinator.update_state, "push_config", apply, {})
+        else:
+            self.push_config = apply(self.push_config)
+        self._save_push_config()
+        self.camp_index = self._build_camp_index()
+        return result
+    
+    async def _reload_push_config_if_changed(self):
+        """多实例模式下，其他进程修改了推送配置时重新加载"""
+        if not self.coordinator:
+            return
+        
+        push_config = await asyncio.to_thread(self.coordinator.get_state, "push_config", {})
+        if push_config != self.push_config:
+            self.push_config = push_config
+            self.camp_index = self._build_camp_index()
+            logger.debug("检测到推送配置被其他进程修改，已重新加载")
+    
     def _load_last_battles(self) -> Dict:
         """加载上次战绩记录"""
         if self.last_battle_file.exists():
             try:
-                with open(self.last_battle_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return json_codec.load_file(self.last_battle_file)
             except Exception as e:
                 logger.error(f"加载战绩记录失败: {e}")
         return {}
@@ -58,54 +138,125 @@ class BattlePushManager:
     def _save_last_battles(self):
         """保存战绩记录"""
         try:
-            with open(self.last_battle_file, 'w', encoding='utf-8') as f:
-                json.dump(self.last_battles, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(self.last_battles, self.last_battle_file)
         except Exception as e:
             logger.error(f"保存战绩记录失败: {e}")
     
-    def add_push_user(self, user_id: str, camp_id: str, group_id: Optional[str] = None) -> str:
-        """添加战绩推送用户"""
-        user_id = str(user_id)
+    async def _get_watermark(self, user_id: str) -> Optional[Dict]:
+        """获取用户的战绩水位线（多实例模式下从共享数据库读取）
         
-        if user_id not in self.push_config:
-            self.push_config[user_id] = {
-                "camp_id": camp_id,
-                "groups": [],
-                "enabled": True
-            }
+        水位线格式: {"gametime": 已推送的最新对局时间, "seen": 最近已推送的战绩标识列表}
+        """
+        if self.coordinator:
+            value = await asyncio.to_thread(self.coordinator.get_state, f"last_battle:{user_id}")
+        else:
+            value = self.last_battles.get(user_id)
         
-        # 添加群组
-        if group_id:
-            group_id = str(group_id)
-            if group_id not in self.push_config[user_id]["groups"]:
-                self.push_config[user_id]["groups"].append(group_id)
+        # 兼容旧版本只记录最新一场 "gameSeq_gametime" 的格式
+        if isinstance(value, str):
+            gametime = value.split("_", 1)[1] if "_" in value else ""
+            return {"gametime": gametime, "seen": [value]}
+        return value
+    
+    async def _set_watermark(self, user_id: str, watermark: Dict):
+        """保存用户的战绩水位线"""
+        if self.coordinator:
+            await asyncio.to_thread(self.coordinator.set_state, f"last_battle:{user_id}", watermark)
+            return
+        self.last_battles[user_id] = watermark
+        self._save_last_battles()
+    
+    @staticmethod
+    def _diff_battles(watermark: Optional[Dict], battle_list: List[Battle]) -> List[Battle]:
+        """对比水位线，返回未推送过的战绩（按对局时间先后排列）"""
+        if watermark is None:
+            # 首次检测只推送最新一场，其余作为历史记录
+            return battle_list[:1]
         
-        self._save_push_config()
-        return f"✅ 已开启战绩推送\n营地ID: {camp_id}\n推送到: {'当前会话' if group_id else '私聊'}"
+        seen = set(watermark.get("seen", []))
+        latest = watermark.get("gametime", "")
+        unseen = [
+            battle for battle in battle_list
+            if battle.gametime >= latest and battle.battle_id not in seen
+        ]
+        return sorted(unseen, key=lambda battle: battle.gametime)
     
-    def remove_push_user(self, user_id: str, group_id: Optional[str] = None) -> str:
-        """移除战绩推送用户"""
+    @staticmethod
+    def _advance_watermark(watermark: Optional[Dict], battle_list: List[Battle]) -> Dict:
+        """将本次返回的战绩并入水位线"""
+        watermark = watermark or {"gametime": "", "seen": []}
+        seen = [battle.battle_id for battle in battle_list]
+        seen += [battle_id for battle_id in watermark.get("seen", []) if battle_id not in seen]
+        return {
+            "gametime": max([watermark.get("gametime", "")] + [battle.gametime for battle in battle_list]),
+            "seen": seen[:WATERMARK_SIZE]
+        }
+    
+    def _build_camp_index(self) -> Dict[str, List[str]]:
+        """构建 营地ID -> 订阅用户列表 的反向索引"""
+        index: Dict[str, List[str]] = {}
+        for user_id, config in self.push_config.items():
+            if not config.get("enabled", True):
+                continue
+            index.setdefault(str(config["camp_id"]), []).append(user_id)
+        return index
+    
+    async def add_push_user(
+        self,
+        user_id: str,
+        camp_id: str,
+        group_id: Optional[str] = None,
+        origin: Optional[str] = None
+    ) -> str:
+        """添加战绩推送用户，origin 为推送目标会话的 unified_msg_origin"""
         user_id = str(user_id)
+        group_id = str(group_id) if group_id else None
         
-        if user_id not in self.push_config:
-            return "❌ 未开启战绩推送"
+        def change(push_config: Dict) -> str:
+            if user_id not in push_config:
+                push_config[user_id] = {
+                    "camp_id": camp_id,
+                    "groups": [],
+                    "enabled": True
+                }
+            
+            # 添加群组
+            if group_id and group_id not in push_config[user_id]["groups"]:
+                push_config[user_id]["groups"].append(group_id)
+            
+            # 记录推送目标会话（群聊以群号为键，私聊为 private）
+            if origin:
+                push_config[user_id].setdefault("origins", {})[group_id or "private"] = origin
+            
+            return f"✅ 已开启战绩推送\n营地ID: {camp_id}\n推送到: {'当前会话' if group_id else '私聊'}"
         
-        if group_id:
-            group_id = str(group_id)
-            if group_id in self.push_config[user_id]["groups"]:
-                self.push_config[user_id]["groups"].remove(group_id)
-                self._save_push_config()
-                return f"✅ 已关闭本群的战绩推送"
-        else:
-            del self.push_config[user_id]
-            self._save_push_config()
+        return await self._modify_push_config(change)
+    
+    async def remove_push_user(self, user_id: str, group_id: Optional[str] = None) -> str:
+        """移除战绩推送用户"""
+        user_id = str(user_id)
+        group_id = str(group_id) if group_id else None
+        
+        def change(push_config: Dict) -> str:
+            if user_id not in push_config:
+                return "❌ 未开启战绩推送"
+            
+            if group_id:
+                if group_id in push_config[user_id]["groups"]:
+                    push_config[user_id]["groups"].remove(group_id)
+                    push_config[user_id].get("origins", {}).pop(group_id, None)
+                    return f"✅ 已关闭本群的战绩推送"
+                return "❌ 未在本群开启战绩推送"
+            
+            del push_config[user_id]
             return "✅ 已关闭战绩推送"
         
-        return "❌ 未在本群开启战绩推送"
+        return await self._modify_push_config(change)
     
-    def get_push_status(self, user_id: str) -> str:
+    async def get_push_status(self, user_id: str) -> str:
         """获取推送状态"""
         user_id = str(user_id)
+        await self._reload_push_config_if_changed()
         
         if user_id not in self.push_config:
             return "❌ 未开启战绩推送"
@@ -114,93 +265,374 @@ class BattlePushManager:
         status = "✅ 战绩推送已开启\n"
         status += f"营地ID: {config['camp_id']}\n"
         status += f"状态: {'启用' if config['enabled'] else '暂停'}\n"
+        status += f"当前检测频率: 每{self.get_poll_interval(config['camp_id'])}秒\n"
         
         if config['groups']:
             status += f"推送群组: {len(config['groups'])}个"
         else:
             status += "推送方式: 私聊"
         
+        if self.cycle_stats:
+            status += f"\n检测间隔: {self.cycle_stats['interval']}秒，上轮耗时: {self.cycle_stats['duration']}秒"
+            if self.cycle_stats["lag"] > 0:
+                status += f"（滞后 {self.cycle_stats['lag']}秒）"
+        
         return status
     
-    async def check_new_battles(self):
-        """检查新战绩"""
-        for user_id, config in self.push_config.items():
-            if not config.get("enabled", True):
-                continue
-            
+    def _get_int_config(self, key: str, default: int, minimum: int = 0) -> int:
+        """读取整数配置项"""
+        config = getattr(self.plugin, "config", None) or {}
+        try:
+            value = int(config.get(key, default))
+        except (ValueError, TypeError):
+            logger.warning(f"配置项 {key} 类型错误，使用默认值 {default}")
+            value = default
+        return max(minimum, value)
+    
+    async def check_new_battles(self, spread: float = 0) -> int:
+        """检查新战绩（每个营地ID每轮只请求一次，结果分发给所有订阅者）
+        
+        spread > 0 时各营地ID的请求在 spread 秒内错开并加入随机抖动，
+        同时受 push_concurrency 并发上限约束，返回本轮轮询的营地ID数量
+        """
+        camp_ids = list(self.camp_index)
+        
+        # 多实例模式：只处理按一致性哈希分配给本进程的营地ID
+        if self.coordinator:
+            await self._reload_push_config_if_changed()
+            camp_ids = await asyncio.to_thread(self.coordinator.owned, list(self.camp_index))
+            await self._apply_active_marks(camp_ids)
+        
+        # 按活跃度跳过尚未到期的营地ID
+        camp_ids = [camp_id for camp_id in camp_ids if self._is_due(camp_id)]
+        
+        if not camp_ids:
+            return 0
+        
+        semaphore = asyncio.Semaphore(self._get_int_config("push_concurrency", 4, 1))
+        slot = spread / len(camp_ids)
+        
+        async def run(position: int, camp_id: str):
+            if slot > 0:
+                await asyncio.sleep(position * slot + random.uniform(0, slot))
+            async with semaphore:
+                await self._poll_camp(camp_id)
+        
+        try:
+            await asyncio.gather(*(run(i, camp_id) for i, camp_id in enumerate(camp_ids)))
+        finally:
+            # 轮询错开在整个周期内，本轮全部轮询完成后再推送，同一对局的队友不论相隔多久被轮询都能合并
+            self._flush_matches()
+        return len(camp_ids)
+    
+    async def _poll_camp(self, camp_id: str):
+        """轮询单个营地ID并分发给其订阅者"""
+        # 租约覆盖一个轮询间隔，本进程存活时其他进程不会在两轮之间接管
+        if self.coordinator:
             try:
-                camp_id = config["camp_id"]
-                
-                # 获取最新战绩
-                battle_data = await api_service.get_more_battle_list(camp_id)
-                if not battle_data.get("data") or not battle_data["data"].get("list"):
-                    continue
-                
-                battle_list = battle_data["data"]["list"]
-                if not battle_list:
+                leased = await asyncio.to_thread(
+                    self.coordinator.acquire_lease, camp_id, self.get_poll_interval(camp_id)
+                )
+            except sqlite3.OperationalError as e:
+                # 数据库被其他进程长时间占用时本轮跳过，下一轮再试
+                logger.warning(f"获取营地ID {camp_id} 的轮询租约失败，本轮跳过: {e}")
+                return
+            if not leased:
+                return
+        
+        user_ids = self.camp_index.get(camp_id, [])
+        try:
+            # 获取最新战绩（强制刷新，结果写入共享缓存供查询指令复用）
+            battle_list = await api_service.fetch_battles(camp_id, max_age=0)
+            if not battle_list:
+                self._update_poll_state(camp_id, battle_list, has_new=False)
+                return
+            
+            has_new = False
+            
+            for user_id in user_ids:
+                config = self.push_config.get(user_id)
+                if not config:
                     continue
                 
-                # 获取最新一场战绩
-                latest_battle = battle_list[0]
-                battle_id = f"{latest_battle.get('gameSeq')}_{latest_battle.get('gametime')}"
-                
-                # 检查是否是新战绩
-                last_battle_id = self.last_battles.get(user_id)
+                # 与水位线对比，两次检测之间打了多场也不会漏推
+                watermark = await self._get_watermark(user_id)
+                new_battles = self._diff_battles(watermark, battle_list)
                 
-                if last_battle_id != battle_id:
-                    # 发现新战绩
-                    self.last_battles[user_id] = battle_id
-                    self._save_last_battles()
+                if new_battles:
+                    await self._set_watermark(user_id, self._advance_watermark(watermark, battle_list))
+                    has_new = True
                     
-                    # 推送新战绩
-                    await self._push_battle(user_id, latest_battle, config)
-                    
-            except Exception as e:
-                logger.error(f"检查用户 {user_id} 战绩失败: {e}", exc_info=True)
+                    # 按对局归并后延迟推送新战绩
+                    for battle in new_battles:
+                        self._queue_match(user_id, battle, config)
+            
+            self._update_poll_state(camp_id, battle_list, has_new)
+                
+        except Exception as e:
+            logger.error(f"检查营地ID {camp_id} 战绩失败: {e}", exc_info=True)
+    
+    def _is_due(self, camp_id: str) -> bool:
+        """判断营地ID本轮是否需要轮询（每轮调用一次，未到期时消耗一轮等待）"""
+        state = self.poll_state.get(camp_id)
+        if not state or state["skip"] <= 0:
+            return True
+        state["skip"] -= 1
+        return False
+    
+    def _is_recently_active(self, camp_id: str, battle_list: List[Battle]) -> bool:
+        """根据缓存的主页在线状态和最近一场战绩时间判断玩家是否活跃（不额外请求接口）"""
+        now = time.time()
+        
+        profile = api_service.peek_profile(camp_id)
+        role = profile.default_role if profile else None
+        if role:
+            if role.game_online in (1, 2):
+                return True
+            if role.offline_time and now - role.offline_time < ACTIVE_WINDOW:
+                return True
+        
+        if battle_list:
+            try:
+                last_game = datetime.strptime(battle_list[0].gametime, "%Y-%m-%d %H:%M:%S").timestamp()
+                return now - last_game < ACTIVE_WINDOW
+            except ValueError:
+                pass
+        return False
+    
+    def _update_poll_state(self, camp_id: str, battle_list: List[Battle], has_new: bool):
+        """更新营地ID的轮询间隔：活跃时每轮检测，不活跃时按 2 的幂次退避"""
+        base = self.cycle_stats.get("interval") or self._get_int_config("check_interval", 300, 30)
+        max_interval = self._get_int_config("push_max_interval", 3600, base)
+        max_level = max(0, int(math.log2(max_interval / base)))
+        
+        state = self.poll_state.setdefault(camp_id, {"level": 0, "skip": 0})
+        if has_new or self._is_recently_active(camp_id, battle_list):
+            state["level"] = 0
+        else:
+            state["level"] = min(max_level, state["level"] + 1)
+        state["skip"] = 2 ** state["level"] - 1
+        state["at"] = time.time()
+    
+    async def mark_active(self, camp_id: Optional[str]):
+        """用户使用指令时重置轮询间隔，下一轮立即检测
+        
+        多实例模式下营地ID可能由其他进程轮询，活跃时间同时写入共享数据库，由负责的进程在下一轮读取
+        """
+        if not camp_id:
+            return
+        camp_id = str(camp_id)
+        if camp_id in self.poll_state:
+            self.poll_state[camp_id] = {"level": 0, "skip": 0}
+        if self.coordinator and camp_id in self.camp_index:
+            try:
+                await asyncio.to_thread(self.coordinator.set_state, f"active:{camp_id}", time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"记录营地ID {camp_id} 的活跃时间失败: {e}")
+    
+    async def _apply_active_marks(self, camp_ids: List[str]):
+        """多实例模式下，用户在上次轮询之后（在任一进程中）使用过指令的营地ID重置轮询间隔"""
+        marks = await asyncio.to_thread(self.coordinator.get_states, "active:")
+        for camp_id in camp_ids:
+            state = self.poll_state.get(camp_id)
+            if state and marks.get(camp_id, 0) > state.get("at", 0):
+                self.poll_state[camp_id] = {"level": 0, "skip": 0}
+    
+    def get_poll_interval(self, camp_id: str) -> int:
+        """获取营地ID当前的轮询间隔（秒）"""
+        base = self.cycle_stats.get("interval") or self._get_int_config("check_interval", 300, 30)
+        state = self.poll_state.get(str(camp_id))
+        return base * 2 ** state["level"] if state else base
     
-    async def _push_battle(self, user_id: str, battle: dict, config: dict):
-        """推送战绩"""
+    def _queue_match(self, user_id: str, battle: Battle, config: dict):
+        """按对局归并新战绩：同一对局的多名玩家只获取一次详情、生成一条推送"""
+        targets = config.get("origins", {})
+        if not targets:
+            logger.warning(f"用户 {user_id} 的推送配置缺少会话信息，请重新开启战绩推送")
+            return
+        
+        key = battle.match_key
+        match = self._pending_matches.get(key)
+        if match is None:
+            match = self._pending_matches[key] = {
+                "key": key, "players": {}, "targets": {}, "queued_at": time.time(), "scheduled": False
+            }
+        
+        # 同一营地ID被多个用户订阅时只算一名玩家
+        match["players"].setdefault(config["camp_id"], battle)
+        for target in targets.values():
+            match["targets"][target] = True
+    
+    def _flush_matches(self):
+        """为本轮新发现的对局安排推送"""
+        for key, match in self._pending_matches.items():
+            if not match["scheduled"]:
+                match["scheduled"] = True
+                self._schedule_push(key, match["queued_at"])
+    
+    def _schedule_push(self, key: str, queued_at: float):
+        """按 push_delay 延迟推送，避免数据未完全更新，且不阻塞轮询
+        
+        延迟从发现对局时开始计算，等待本轮轮询结束的时间计入其中
+        """
+        delay = max(0.0, self._get_int_config("push_delay", 60, 0) - (time.time() - queued_at))
+        task = asyncio.create_task(self._delayed_push(delay, key))
+        self._push_tasks.add(task)
+        task.add_done_callback(self._push_tasks.discard)
+    
+    async def _delayed_push(self, delay: float, key: str):
+        """等待 push_delay 后推送，等待期间同一对局的其他玩家会并入"""
+        if delay:
+            await asyncio.sleep(delay)
+        match = self._pending_matches.pop(key, None)
+        if match:
+            await self._push_match(match)
+    
+    async def _push_match(self, match: Dict):
+        """推送一场对局（交给投递器按目标合并发送）"""
         try:
-            # 构建战绩消息
-            result = "✅ 胜利" if battle.get("isWin") == 1 else "❌ 失败"
-            hero_name = battle.get("heroName", "未知")
-            kda = f"{battle.get('killNum', 0)}/{battle.get('deadNum', 0)}/{battle.get('assistNum', 0)}"
-            map_name = battle.get("mapName", "未知")
-            score = battle.get("score", 0)
+            players = list(match["players"].items())
+            camp_id, battle = players[0]
+            
+            # 对局详情每场只获取一次，以第一名玩家为视角
+            detail = {}
+            try:
+                detail = (await api_service.fetch_battle_detail(camp_id, battle)).get("data") or {}
+            except Exception as e:
+                logger.warning(f"获取对局详情失败，仅推送基础战绩: {e}")
             
-            message = f"🎮 【新战绩推送】\n\n"
-            message += f"结果: {result}\n"
-            message += f"英雄: {hero_name}\n"
-            message += f"KDA: {kda}\n"
-            message += f"地图: {map_name}\n"
-            message += f"评分: {score}\n"
-            message += f"时间: {battle.get('gametime', '')}"
+            message = self._build_match_message(players, detail)
+            targets = list(match["targets"])
             
-            # 推送到配置的群组或私聊
-            # 注意：这里需要根据AstrBot的API来发送消息
-            # 由于我们没有直接的消息发送API，这里只记录日志
-            logger.info(f"战绩推送 - 用户 {user_id}: {message}")
+            # 卡片只渲染一次，所有目标复用同一图片，渲染失败时回退为文本
+            image = None
+            # 负载降级为纯文本时直接推送文本
+            if self.plugin.config.get("push_image", True) and not self.plugin.degradation.text_only:
+                image = await self.dispatcher.cards.get_or_render(
+                    match["key"], targets, lambda: self._render_match_card(players, detail)
+                )
             
-            # TODO: 实现实际的消息推送
-            # 需要使用AstrBot的消息发送API
+            for target in targets:
+                if image:
+                    self.dispatcher.enqueue(target, None, image=image, card_key=match["key"])
+                else:
+                    self.dispatcher.enqueue(target, message)
             
         except Exception as e:
             logger.error(f"推送战绩失败: {e}", exc_info=True)
     
-    async def start_push_task(self, interval: int = 60):
+    @staticmethod
+    def _player_name(camp_id: str) -> str:
+        """玩家名称取自缓存的主页资料，不额外请求"""
+        profile = api_service.peek_profile(camp_id, max_age=float("inf"))
+        role = profile.default_role if profile else None
+        return role.role_name if role else camp_id
+    
+    async def _render_match_card(self, players: List[tuple], detail: Dict) -> Optional[str]:
+        """渲染对局推送卡片，返回本地图片路径"""
+        battle = players[0][1]
+        template_data = {
+            "mapName": battle.map_name,
+            "gameTime": battle.gametime,
+            "duration": f"{battle.used_time // 60}分{battle.used_time % 60}秒",
+            "players": [
+                {
+                    "name": self._player_name(camp_id),
+                    "isWin": player_battle.is_win,
+                    "heroName": player_battle.hero_name,
+                    "heroIcon": player_battle.hero_icon,
+                    "kda": player_battle.kda,
+                    "score": player_battle.score,
+                    "tags": player_battle.tags
+                }
+                for camp_id, player_battle in players
+            ],
+            "detail": {
+                "name": self._player_name(players[0][0]),
+                "totalMoney": detail.get("totalMoney", 0),
+                "hurt": detail.get("hurt", 0),
+                "hurtTaken": detail.get("hurtTaken", 0)
+            } if detail else None
+        }
+        
+        return await self.plugin.render_template(
+            "battle_push.html", template_data, return_url=False, options=self.plugin.get_render_options(),
+            cache=False,
+            priority=PRIORITY_PUSH
+        )
+    
+    def _build_match_message(self, players: List[tuple], detail: Dict) -> str:
+        """构建对局推送消息，列出对局中所有被追踪的玩家"""
+        battle = players[0][1]
+        lines = [
+            f"地图: {battle.map_name}",
+            f"时间: {battle.gametime}",
+            f"时长: {battle.used_time // 60}分{battle.used_time % 60}秒",
+            ""
+        ]
+        
+        for camp_id, player_battle in players:
+            result = "✅ 胜利" if player_battle.is_win else "❌ 失败"
+            lines.append(
+                f"{self._player_name(camp_id)}: {result} | {player_battle.hero_name} | "
+                f"KDA {player_battle.kda} | 评分 {player_battle.score}"
+            )
+        
+        if detail:
+            lines.append(
+                f"📊 {self._player_name(players[0][0])}: 金币 {detail.get('totalMoney', 0)} | "
+                f"伤害 {detail.get('hurt', 0)} | 承伤 {detail.get('hurtTaken', 0)}"
+            )
+        
+        return "\n".join(lines)
+    
+    async def start_push_task(self, interval: int = 300):
         """启动推送任务"""
         logger.info(f"战绩推送任务已启动，检查间隔: {interval}秒")
+        loop = asyncio.get_running_loop()
         
         while True:
+            started = loop.time()
+            polled = 0
             try:
-                await self.check_new_battles()
+                # 轮询分散在间隔的前 80% 内，留出余量保证本轮在下一轮开始前完成
+                polled = await self.check_new_battles(spread=interval * 0.8)
             except Exception as e:
                 logger.error(f"战绩推送任务出错: {e}", exc_info=True)
             
+            elapsed = loop.time() - started
+            lag = max(0.0, elapsed - interval)
+            self.cycle_stats = {
+                "interval": interval,
+                "polled": polled,
+                "duration": round(elapsed, 1),
+                "lag": round(lag, 1),
+                "finished_at": time.time()
+            }
+            if lag > 0:
+                logger.warning(
+                    f"战绩推送周期滞后: 本轮轮询 {polled} 个营地ID耗时 {elapsed:.1f}秒，"
+                    f"超出检测间隔 {lag:.1f}秒，可调大 push_concurrency 或 check_interval"
+                )
+            
+            await asyncio.sleep(max(0.0, interval - elapsed))
+    
+    async def _heartbeat_loop(self):
+        """多实例模式下独立于轮询周期定时上报心跳（每 worker_heartbeat_ttl 的三分之一）"""
+        interval = self.coordinator.heartbeat_ttl / 3
+        while True:
+            try:
+                await asyncio.to_thread(self.coordinator.heartbeat)
+            except Exception as e:
+                logger.error(f"上报推送进程心跳失败: {e}")
             await asyncio.sleep(interval)
     
-    def start(self, interval: int = 60):
-        """启动推送服务"""
+    def start(self, interval: Optional[int] = None):
+        """启动推送服务（未指定间隔时使用 check_interval 配置）"""
+        if interval is None:
+            interval = self._get_int_config("check_interval", 300, 30)
+        if self.coordinator and (self.heartbeat_task is None or self.heartbeat_task.done()):
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
         if self.task is None or self.task.done():
             self.task = asyncio.create_task(self.start_push_task(interval))
             logger.info("战绩推送服务已启动")
@@ -210,3 +642,12 @@ class BattlePushManager:
         if self.task and not self.task.done():
             self.task.cancel()
             logger.info("战绩推送服务已停止")
+        if self.heartbeat_task and not self.heartbeat_task.done():
+            self.heartbeat_task.cancel()
+        
+        for task in list(self._push_tasks):
+            task.cancel()
+        self.dispatcher.stop()
+        
+        if self.coordinator:
+            self.coordinator.leave()
@@ -0,0 +1,142 @@
+"""
+指令冷却模块
+冷却时间内同一用户（或同一群内针对同一营地ID、同一角色）的重复指令直接重放上次成功的结果，
+不再请求接口和渲染图片
+"""
+
+import copy
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from astrbot.api import logger
+from .metrics import metrics
+
+
+# 缓存条目超过该数量时清理过期条目
+PRUNE_THRESHOLD = 512
+
+# 以该前缀开头的文本视为失败结果，不参与重放
+FAILURE_PREFIX = "❌"
+
+
+class CommandCooldown:
+    """指令冷却与结果重放"""
+
+    def __init__(self, plugin_instance):
+        self.plugin = plugin_instance
+        # 冷却键 -> (生成时间, 冷却时长, 结果列表)
+        self._entries: Dict[str, Tuple[float, int, List[Any]]] = {}
+
+    def _get_window(self, key: str, default: int) -> int:
+        """读取冷却时长配置（秒）"""
+        try:
+            return max(0, int(self.plugin.config.get(key, default)))
+        except (ValueError, TypeError):
+            return default
+
+    def _keys(
+        self,
+        command: str,
+        args: str,
+        user_id: str,
+        group_id: Optional[str],
+        camp_id: str,
+        role_id: Optional[str],
+        group_shared: bool
+    ) -> List[Tuple[str, int]]:
+        """生成冷却键及对应的冷却时长"""
+        command = f"{command}{args}"
+        keys = [(f"{command}|user:{user_id}|{camp_id}", self._get_window("command_cooldown", 30))]
+        if group_id and group_shared:
+            # 结果取决于调用者选择的角色，角色不同的群成员不共用结果
+            keys.append((f"{command}|group:{group_id}|role:{role_id or ''}|{camp_id}", self._get_window("group_cooldown", 60)))
+        return [(key, window) for key, window in keys if window > 0]
+
+    @staticmethod
+    def _is_failure(result: Any) -> bool:
+        """判断结果是否为失败提示"""
+        get_text = getattr(result, "get_plain_text", None)
+        if not callable(get_text):
+            return False
+        try:
+            return get_text().lstrip().startswith(FAILURE_PREFIX)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _has_missing_file(result: Any) -> bool:
+        """判断结果中的本地图片是否已不存在（如渲染缓存已淘汰）"""
+        for component in getattr(result, "chain", None) or []:
+            path = getattr(component, "path", None)
+            file = getattr(component, "file", None)
+            if not path and isinstance(file, str) and file.startswith("file://"):
+                path = file[len("file:///"):] if file.startswith("file:///") else file[len("file://"):]
+                if not os.path.isabs(path):
+                    path = "/" + path
+            if path and not os.path.exists(path):
+                return True
+        return False
+
+    async def run(
+        self,
+        event,
+        command: str,
+        camp_id: str,
+        produce: Callable[[], AsyncIterator[Any]],
+        role_id: Optional[str] = None,
+        group_shared: bool = True,
+        args: str = ""
+    ) -> AsyncIterator[Any]:
+        """
+        执行指令，冷却时间内的重复指令重放上次成功的结果
+
+        command 为固定的指令名（用于统计），指令参数（如页码）通过 args 传入，只参与冷却键；
+        role_id 为调用者选择的角色，结果依赖所选角色的指令需传入；
+        结果只属于调用者本人的指令（如全部账号）需传入 group_shared=False，不与群成员共用
+        """
+        user_id = str(event.get_sender_id())
+        group_id = event.get_group_id() or None
+        keys = self._keys(command, args, user_id, group_id, str(camp_id), role_id, group_shared)
+        now = time.time()
+
+        for key, window in keys:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] <= window:
+                # 结果引用的图片已被删除时重新执行
+                if any(self._has_missing_file(result) for result in entry[2]):
+                    del self._entries[key]
+                    continue
+                metrics.incr("cooldown.suppressed")
+                metrics.incr(f"cooldown.suppressed.{command}")
+                logger.debug(f"指令处于冷却中，重放上次结果: {key}")
+                for result in entry[2]:
+                    yield copy.deepcopy(result)
+                return
+
+        metrics.incr(f"command.{command}")
+        produced = []
+        async for result in produce():
+            produced.append(copy.deepcopy(result))
+            yield result
+
+        # 查询失败的提示和负载降级期间的文本结果不重放，下次重新请求
+        degradation = getattr(self.plugin, "degradation", None)
+        degraded = bool(degradation and degradation.text_only)
+        if produced and not degraded and not any(self._is_failure(result) for result in produced):
+            now = time.time()
+            for key, window in keys:
+                self._entries[key] = (now, window, produced)
+            if len(self._entries) > PRUNE_THRESHOLD:
+                self._prune(now)
+
+    def invalidate(self, user_id: Optional[str] = None, camp_id: Optional[str] = None):
+        """清除与用户或营地ID相关的冷却结果（如切换角色后）"""
+        for key in list(self._entries):
+            if (user_id and f"|user:{user_id}|" in key) or (camp_id and key.endswith(f"|{camp_id}")):
+                del self._entries[key]
+
+    def _prune(self, now: float):
+        """清理过期条目"""
+        for key, (created, window, _) in list(self._entries.items()):
+            if now - created > window:
+                del self._entries[key]
@@ -0,0 +1,157 @@
+"""
+负载降级模块
+根据渲染排队长度、渲染耗时 p95 和事件循环延迟调整输出方式：
+负载升高时先降低渲染倍率和质量，继续升高时改为直接发送文本，负载下降后逐级恢复
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+from astrbot.api import logger
+from .metrics import metrics
+
+
+# 降级级别
+LEVEL_NORMAL = 0
+LEVEL_REDUCED = 1
+LEVEL_TEXT = 2
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "正常",
+    LEVEL_REDUCED: "低画质",
+    LEVEL_TEXT: "纯文本"
+}
+
+# 检查间隔（秒），渲染耗时按最近 STATS_WINDOW 秒内的样本计算
+CHECK_INTERVAL = 5
+STATS_WINDOW = 60
+
+# 负载指标超过阈值该倍数时直接降为纯文本
+TEXT_FACTOR = 2
+# 负载指标低于阈值该比例并持续 RECOVER_CHECKS 次检查后恢复一级
+RECOVER_RATIO = 0.5
+RECOVER_CHECKS = 3
+
+# 低画质级别使用的渲染参数
+REDUCED_SCALE = 1
+REDUCED_QUALITY = 70
+
+
+class RenderDegraded(Exception):
+    """负载过高，暂停图片渲染"""
+
+
+class DegradationController:
+    """负载降级控制"""
+
+    def __init__(self, plugin_instance):
+        self.plugin = plugin_instance
+        self.level = LEVEL_NORMAL
+        self.loop_lag = 0.0
+        self.changed_at = time.time()
+        self._healthy_checks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.plugin.config.get("degrade_enabled", True))
+
+    @property
+    def text_only(self) -> bool:
+        """当前是否只发送文本"""
+        return self.level >= LEVEL_TEXT
+
+    def _get_threshold(self, key: str, default: float) -> float:
+        """读取阈值配置"""
+        try:
+            return max(0.0, float(self.plugin.config.get(key, default)))
+        except (ValueError, TypeError):
+            return default
+
+    def start(self):
+        """启动负载监控"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._monitor())
+
+    def stop(self):
+        """停止负载监控"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _monitor(self):
+        """定时测量事件循环延迟并更新降级级别"""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(CHECK_INTERVAL)
+            # 事件循环繁忙时 sleep 会比预期更晚返回
+            self.loop_lag = max(0.0, time.perf_counter() - started - CHECK_INTERVAL)
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"更新负载降级状态失败: {e}", exc_info=True)
+
+    def _load_ratios(self) -> Dict[str, float]:
+        """各负载指标与阈值的比值"""
+        scheduler = self.plugin.render_scheduler
+        signals = {
+            "渲染排队": (scheduler.queue_depth, self._get_threshold("degrade_queue_depth", 5)),
+            "渲染p95": (metrics.percentile("render.all", 95, STATS_WINDOW), self._get_threshold("degrade_render_p95", 10)),
+            "事件循环延迟": (self.loop_lag, self._get_threshold("degrade_loop_lag", 0.5))
+        }
+        return {name: value / threshold for name, (value, threshold) in signals.items() if threshold > 0}
+
+    def update(self):
+        """根据当前负载调整降级级别"""
+        if not self.enabled:
+            self._set_level(LEVEL_NORMAL, "已关闭负载降级")
+            return
+
+        ratios = self._load_ratios()
+        worst = max(ratios.values(), default=0.0)
+        reason = ", ".join(f"{name} {ratio:.0%}" for name, ratio in ratios.items())
+
+        target = LEVEL_NORMAL
+        if worst >= TEXT_FACTOR:
+            target = LEVEL_TEXT
+        elif worst >= 1:
+            target = LEVEL_REDUCED
+
+        if target > self.level:
+            self._healthy_checks = 0
+            self._set_level(target, reason)
+            return
+
+        # 负载明显回落并持续一段时间后才逐级恢复，避免来回切换
+        if worst < RECOVER_RATIO and self.level > LEVEL_NORMAL:
+            self._healthy_checks += 1
+            if self._healthy_checks >= RECOVER_CHECKS:
+                self._healthy_checks = 0
+                self._set_level(self.level - 1, reason)
+        else:
+            self._healthy_checks = 0
+
+    def _set_level(self, level: int, reason: str):
+        """切换降级级别并记录日志"""
+        if level == self.level:
+            return
+        logger.warning(f"负载降级: {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]}（{reason}）")
+        metrics.incr(f"degrade.to_{LEVEL_NAMES[level]}")
+        self.level = level
+        self.changed_at = time.time()
+
+    def apply(self, options: Dict) -> Dict:
+        """按当前级别调整渲染参数"""
+        if self.level >= LEVEL_REDUCED:
+            options = dict(options)
+            options["device_scale_factor"] = min(options.get("device_scale_factor", REDUCED_SCALE), REDUCED_SCALE)
+            options["quality"] = min(options.get("quality", REDUCED_QUALITY), REDUCED_QUALITY)
+        return options
+
+    def format_lines(self) -> List[str]:
+        """格式化为文本行"""
+        ratios = self._load_ratios()
+        return [
+            f"• 输出模式: {LEVEL_NAMES[self.level]}（{int(time.time() - self.changed_at) // 60} 分钟前切换）",
+            "• 负载: " + (", ".join(f"{name} {ratio:.0%}" for name, ratio in ratios.items()) or "未设置阈值")
+        ]
@@ -2,15 +2,23 @@
 Game data query module
 """
 
-import os
-import json
-import base64
+import asyncio
+import math
 import time
-import re
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from astrbot.api import logger
 from .api_service import api_service
+from .models import Battle
+from .render_queue import PRIORITY_BACKGROUND
+
+
+# 战绩页头部背景和 Logo
+BATTLE_LIST_BG_URL = "https://game.gtimg.cn/images/yxzj/web202311/bg-ba51e5f9.jpg"
+LOGO_URL = "https://raw.gitcode.com/Kevin1217/resources/blobs/57feeb4f3940fd449c4dd85f1f63b91f4c17f62a/logo_new_gold.png"
+
+# 战绩列表最多显示的场次
+MAX_BATTLES = 30
 
 
 class GameStatsQuery:
@@ -19,11 +27,31 @@ class GameStatsQuery:
     def __init__(self, data_dir, plugin_instance):
         self.data_dir = data_dir
         self.plugin = plugin_instance
+        # 后台预渲染任务，保留引用避免被回收
+        self._prerender_tasks = set()
     
     def _get_render_options(self):
         """获取图片渲染配置选项（使用插件统一配置）"""
         return self.plugin.get_render_options()
 
+    def _get_cache_policy(self) -> dict:
+        """获取过期缓存复用配置"""
+        policy = {}
+        for key, config_key, default in (("revalidate_ttl", "cache_revalidate_ttl", 300),
+                                         ("max_stale", "cache_max_stale", 3600)):
+            try:
+                policy[key] = max(0, int(self.plugin.config.get(config_key, default)))
+            except (ValueError, TypeError):
+                policy[key] = default
+        return policy
+
+    @staticmethod
+    def _format_data_time(fetched_at: float) -> str:
+        """数据来自较早的缓存时返回数据时间，否则返回空字符串"""
+        if time.time() - fetched_at <= 30:
+            return ""
+        return datetime.fromtimestamp(fetched_at).strftime("%m-%d %H:%M:%S")
+
     async def get_homepage(self, camp_id: str, event, user_id: str = None):
         """获取王者主页"""
         try:
@@ -33,14 +61,15 @@ class GameStatsQuery:
             if debug_mode:
                 logger.info(f"开始查询王者主页，营地ID: {camp_id}")
             
-            # 获取用户资料
-            profile_data = await api_service.get_profile(camp_id)
+            # 获取用户资料（稍旧的缓存先返回并后台刷新，接口异常时回退到旧缓存）
+            profile = await api_service.fetch_profile_swr(camp_id, **self._get_cache_policy())
+            data_time = self._format_data_time(profile.fetched_at)
             
             if debug_mode:
-                logger.info(f"API响应完整数据: {profile_data}")
+                logger.info(f"API响应完整数据: {profile.raw}")
             
            
-            return_code = profile_data.get("returnCode")
+            return_code = profile.return_code
             
             if return_code == -30107:
                 yield event.plain_result("❌ 获取数据失败，请稍后重试")
@@ -50,17 +79,17 @@ class GameStatsQuery:
                 yield event.plain_result(f"❌ ID: {camp_id}\n召唤师隐藏了主页信息，无法查看")
                 return
             
-            profile = profile_data["data"]
-            role_list = profile.get("roleList", [])
-            
-            if not role_list:
+            if not profile.roles:
                 yield event.plain_result("❌ 未找到角色数据")
                 return
             
+            # 顺带记录战力快照，不额外请求接口
+            self.plugin.profile_history.record_profile(camp_id, profile)
+            
             # 检查用户是否选择了特定角色
             current_role = None
             is_custom_role = False  # 标记是否使用了自定义选择的角色
-            target_role_id = profile.get("targetRoleId")
+            target_role_id = profile.target_role_id
             
             if user_id:
                 if debug_mode:
@@ -71,98 +100,52 @@ class GameStatsQuery:
                 
                 if selected_role_id:
                     # 查找用户选择的角色
-                    for role in role_list:
-                        if role.get("roleId") == selected_role_id:
-                            current_role = role
-                            # 判断是否是非默认角色
-                            if selected_role_id != target_role_id:
-                                is_custom_role = True
-                            if debug_mode:
-                                logger.info(f"使用用户选择的角色: {selected_role_id} - {role.get('roleName')}, 是否自定义: {is_custom_role}")
-                                logger.info(f"选择的角色完整信息: {role}")
-                            break
-                    
-                    if not current_role:
+                    current_role = profile.role(selected_role_id)
+                    if current_role:
+                        # 判断是否是非默认角色
+                        is_custom_role = selected_role_id != target_role_id
+                        if debug_mode:
+                            logger.info(f"使用用户选择的角色: {selected_role_id} - {current_role.role_name}, 是否自定义: {is_custom_role}")
+                            logger.info(f"选择的角色完整信息: {current_role.raw}")
+                    else:
                         logger.warning(f"未找到用户选择的角色 {selected_role_id}，使用默认角色")
             
-            # 如果没有选择角色，使用默认逻辑
+            # 如果没有选择角色，使用默认角色（targetRoleId 对应角色或第一个角色）
             if not current_role:
-                # 找到目标角色
-                for role in role_list:
-                    if role.get("roleId") == target_role_id:
-                        current_role = role
-                        break
-                
-                if not current_role:
-                    # 如果没找到，使用第一个角色
-                    current_role = role_list[0]
-            
-
-            head_data = profile.get("head", {})
-            mods = head_data.get("mods", [])
+                current_role = profile.default_role
             
-            # 找到关键的mod数据
-            mode_10v10 = None  # modId: 708
-            mode_5v5 = None    # modId: 701
-            mode_peak = None   # modId: 702
+            # 找到关键的mod数据（按 modId 索引，param1 按需解析）
+            mode_10v10 = profile.mod(708)  # 10v10模式
+            mode_5v5 = profile.mod(701)    # 5v5模式
+            mode_peak = profile.mod(702)   # 巅峰赛
             
             stats = {}
-            for mod in mods:
-                mod_id = mod.get("modId")
-                name = mod.get("name", "")
-                content = mod.get("content", "0")
-                param1 = mod.get("param1", "")
-                
-
-                if mod_id == 708:  # 10v10模式
-                    mode_10v10 = mod
-                elif mod_id == 701:  # 5v5模式
-                    mode_5v5 = mod
-                elif mod_id == 702:  # 巅峰赛
-                    mode_peak = mod
-                elif mod_id == 304:  # 战斗力
-                    stats["power"] = content
-                elif mod_id == 401:  # 总场次
-                    stats["total"] = content
-                elif mod_id == 408:  # MVP
-                    stats["mvp"] = content
-                elif mod_id == 409:  # 胜率
-                    stats["win_rate"] = content
-                elif mod_id == 201:  # 英雄
-                    stats["hero"] = content
-                elif mod_id == 202:  # 皮肤
-                    stats["skin"] = content
-            
-
-            if mode_10v10:
-                try:
-                    param_data = json.loads(mode_10v10.get("param1", "{}"))
-                    rank_star = param_data.get("rankingStar", "0")
-                    stats["rank_10v10"] = f"{mode_10v10.get('name', '未知')} {rank_star}星"
-                except:
-                    stats["rank_10v10"] = mode_10v10.get("name", "未知")
-            
-            if mode_5v5:
-                try:
-                    param_data = json.loads(mode_5v5.get("param1", "{}"))
-                    rank_star = param_data.get("rankingStar", "0")
-                    stats["rank_5v5"] = f"{mode_5v5.get('name', '未知')} {rank_star}星"
-                except:
-                    stats["rank_5v5"] = mode_5v5.get("name", "未知")
+            for key, mod_id in (("power", 304), ("total", 401), ("mvp", 408),
+                                ("win_rate", 409), ("hero", 201), ("skin", 202)):
+                mod = profile.mod(mod_id)
+                if mod:
+                    stats[key] = mod.content
+            
+            for key, mode in (("rank_10v10", mode_10v10), ("rank_5v5", mode_5v5)):
+                if mode:
+                    if mode.param is not None:
+                        stats[key] = f"{mode.raw.get('name', '未知')} {mode.param.get('rankingStar', '0')}星"
+                    else:
+                        stats[key] = mode.raw.get("name", "未知")
             
             if mode_peak:
-                stats["peak"] = mode_peak.get("name", "巅峰赛")
+                stats["peak"] = mode_peak.raw.get("name", "巅峰赛")
             
 
-            role_name = current_role.get("roleName", "未知")
-            rank_name = current_role.get("roleJobName", "未知")
-            game_level = current_role.get("gameLevel", 0)
-            area_name = current_role.get("areaName", "未知")  # 分区
-            server_name = current_role.get("serverName", "未知")  # 区服
-            role_text = current_role.get("roleText", "未知")
+            role_name = current_role.role_name
+            rank_name = current_role.job_name
+            game_level = current_role.game_level
+            area_name = current_role.area_name  # 分区
+            server_name = current_role.server_name  # 区服
+            role_text = current_role.role_text
             
 
-            game_online_status = current_role.get("gameOnline", 0)
+            game_online_status = current_role.game_online
             game_online_map = {
                 0: "离线",
                 1: "在线",
@@ -171,8 +154,8 @@ class GameStatsQuery:
             game_online = game_online_map.get(game_online_status, "未知")
             
 
-            online_time = current_role.get("onlineTime", 0)
-            offline_time = current_role.get("offlineTime", 0)
+            online_time = current_role.online_time
+            offline_time = current_role.offline_time
             
             def format_time(timestamp):
                 if timestamp == 0:
@@ -212,90 +195,60 @@ class GameStatsQuery:
                 "",
                 "💡 使用【查询战绩】查看详细战绩"
             ]
+            if data_time:
+                info_lines.insert(1, f"🕒 数据时间: {data_time}")
             
             logger.info(f"王者主页查询成功，用户: {role_name}")
             
-            def img_to_base64(img_name):
-                plugin_root = os.path.dirname(os.path.dirname(__file__))
-                
-                try:
-                    img_path = os.path.join(plugin_root, "assets", img_name)
-                    with open(img_path, "rb") as f:
-                        data = base64.b64encode(f.read()).decode('utf-8')
-                        logger.info(f"从assets目录读取图片成功: {img_name}")
-                        return data
-                except:
-                    pass
-                
-                try:
-                    img_path = os.path.join(plugin_root, "resources", "img", img_name)
-                    with open(img_path, "rb") as f:
-                        data = base64.b64encode(f.read()).decode('utf-8')
-                        logger.info(f"从resources/img读取图片成功: {img_name}")
-                        return data
-                except Exception as e:
-                    logger.error(f"读取图片失败 {img_name}: {e}")
-                    return ""
-            
-            plugin_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__))).replace("\\", "/")
-            
-            bg_img_base64 = img_to_base64("bgImgV2.png")
-            if bg_img_base64:
-                logger.info(f"背景图片读取成功，大小: {len(bg_img_base64)} 字符")
-            else:
-                logger.warning("背景图片读取失败，将使用渐变色背景")
+            # 静态图片由资源注册表统一加载，这里只取缓存的引用地址
+            assets = self.plugin.assets
             
             mod_list = []
             combat_data = None
-            for mod in mods:
-                if mod.get("stype") == 0:
+            for mod in profile.mods:
+                if mod.stype == 0:
                     mod_list.append({
-                        "icon": mod.get("icon", ""),
-                        "content": mod.get("content", "0"),
-                        "name": mod.get("name", ""),
-                        "showStyle": mod.get("showStyle", 0)
+                        "icon": mod.icon,
+                        "content": mod.content,
+                        "name": mod.name,
+                        "showStyle": mod.show_style
                     })
-                elif mod.get("stype") == 1:
+                elif mod.stype == 1:
                     combat_data = {
-                        "icon": mod.get("icon", ""),
-                        "content": mod.get("content", "0"),
-                        "name": mod.get("name", "战斗力")
+                        "icon": mod.icon,
+                        "content": mod.content,
+                        "name": mod.raw.get("name", "战斗力")
                     }
             
             rank_star_5v5 = 0
             star_img = ""
             rank_icon = ""
             if mode_5v5:
-                try:
-                    param_data = json.loads(mode_5v5.get("param1", "{}"))
-                    rank_star_5v5 = param_data.get("rankingStar", 0)
-                    star_img = param_data.get("starImg", "")
-                except:
-                    pass
-                rank_icon = mode_5v5.get("icon", "")
+                if mode_5v5.param is not None:
+                    rank_star_5v5 = mode_5v5.param.get("rankingStar", 0)
+                    star_img = mode_5v5.param.get("starImg", "")
+                rank_icon = mode_5v5.icon
             
             rank_star_10v10 = 0
-            if mode_10v10:
-                try:
-                    param_data = json.loads(mode_10v10.get("param1", "{}"))
-                    rank_star_10v10 = param_data.get("rankingStar", 0)
-                except:
-                    pass
+            if mode_10v10 and mode_10v10.param is not None:
+                rank_star_10v10 = mode_10v10.param.get("rankingStar", 0)
             
             mode_peak_race_data = {"param1": {"desc": "未参加", "roleIcon": "", "flagPag": "1"}, "icon": ""}
             if mode_peak:
                 try:
-                    param1 = json.loads(mode_peak.get("param1", "{}"))
+                    param1 = mode_peak.param
+                    if param1 is None:
+                        raise ValueError("param1 解析失败")
                     flag_pag = param1.get("flagPag", "1.pag")
                     if "/" in flag_pag:
                         flag_pag = flag_pag.split("/")[-1]
                     if ".pag" in flag_pag:
                         flag_pag = flag_pag.split(".")[0]
                     mode_peak_race_data = {
-                        "icon": mode_peak.get("icon", ""),
+                        "icon": mode_peak.icon,
                         "param1": {
                             "desc": param1.get("desc", "未参加"),
-                            "roleIcon": param1.get("roleIcon", current_role.get("roleIcon", "")),
+                            "roleIcon": param1.get("roleIcon", current_role.role_icon),
                             "flagPag": flag_pag
                         }
                     }
@@ -315,32 +268,24 @@ class GameStatsQuery:
             is_offline = game_online == '离线'
             honor = 'honor' if is_king else 'roleJob'
             
-            # 读取旗帜和荣耀图标为base64
-            flag_img_base64 = img_to_base64(f"flag{flag_img}.png")
-            honor_img_base64 = img_to_base64(f"{honor}.png")
-            star_img_base64 = img_to_base64("star.png") if is_king else ""
-            cube_img_base64 = img_to_base64("cube.png")
-            peak_avatar_border_base64 = img_to_base64("modePeakRace-avatar.png")
-            
-            # 读取巅峰赛旗帜
+            # 巅峰赛旗帜
             peak_flag_num = mode_peak_race_data.get("param1", {}).get("flagPag", "1")
-            peak_flag_img_base64 = img_to_base64(f"flag{peak_flag_num}.png")
             
             template_data = {
-                "plugin_dir": plugin_dir,
-                "bg_img_base64": bg_img_base64,
-                "flag_img_base64": flag_img_base64,
-                "honor_img_base64": honor_img_base64,
-                "star_img_base64": star_img_base64,
-                "cube_img_base64": cube_img_base64,
-                "peak_avatar_border_base64": peak_avatar_border_base64,
-                "peak_flag_img_base64": peak_flag_img_base64,
-                "roleIcon": current_role.get("roleIcon", ""),
+                "plugin_dir": assets.plugin_dir,
+                "bg_img_src": assets.src("bgImgV2.png"),
+                "flag_img_src": assets.src(f"flag{flag_img}.png"),
+                "honor_img_src": assets.src(f"{honor}.png"),
+                "star_img_src": assets.src("star.png") if is_king else "",
+                "cube_img_src": assets.src("cube.png"),
+                "peak_avatar_border_src": assets.src("modePeakRace-avatar.png"),
+                "peak_flag_img_src": assets.src(f"flag{peak_flag_num}.png"),
+                "roleIcon": current_role.role_icon,
                 "roleName": role_name,
                 "gameLevel": game_level,
                 "gameOnline": game_online,
-                "rank10v10": f"{mode_10v10.get('name', '未知')} {rank_star_10v10}星" if mode_10v10 else "未知",
-                "rank5v5": f"{mode_5v5.get('name', '未知')} {rank_star_5v5}星" if mode_5v5 else "未知",
+                "rank10v10": f"{mode_10v10.raw.get('name', '未知')} {rank_star_10v10}星" if mode_10v10 else "未知",
+                "rank5v5": f"{mode_5v5.raw.get('name', '未知')} {rank_star_5v5}星" if mode_5v5 else "未知",
                 "areaName": area_name,
                 "roleText": role_text,
                 "flagImg": flag_img,
@@ -354,21 +299,14 @@ class GameStatsQuery:
                 "offlineTime": format_time(offline_time),
                 "mod": mod_list,
                 "combat": combat_data,
-                "modePeakRace": mode_peak_race_data
+                "modePeakRace": mode_peak_race_data,
+                "dataTime": data_time
             }
             
-            try:
-                plugin_root = os.path.dirname(os.path.dirname(__file__))
-                template_path = os.path.join(plugin_root, "templates", "homepage_full.html")
-                with open(template_path, "r", encoding="utf-8") as f:
-                    html_template = f.read()
-                
-                url = await self.plugin.html_render(html_template, template_data, options=self._get_render_options())
-                yield event.image_result(url)
-            except Exception as e:
-                logger.error(f"主页渲染图片失败，使用文本回退，错误: {e}", exc_info=True)
-                text = "\n".join(info_lines)
-                yield event.plain_result(text)
+            async for result in self.plugin.render_reply(
+                event, "homepage_full.html", template_data, "\n".join(info_lines), "主页", self._get_render_options()
+            ):
+                yield result
             
         except Exception as e:
             logger.error(f"获取主页失败，营地ID: {camp_id}, 错误: {e}", exc_info=True)
@@ -380,18 +318,183 @@ class GameStatsQuery:
                 f"请稍后重试或检查日志"
             )
 
-    async def query_battle_stats(self, camp_id: str, event, index: Optional[int] = None):
-        """查询战绩"""
+    async def get_power_trend(self, camp_id: str, event, user_id: str = None):
+        """查看战力趋势（仅使用本地记录）"""
+        try:
+            history = self.plugin.profile_history
+            selected_role_id = self.plugin.account_manager.get_selected_role(user_id) if user_id else None
+            role_id = history.find_role(camp_id, selected_role_id)
+            points = history.get_series(role_id) if role_id else []
+
+            if not points:
+                yield event.plain_result(
+                    "❌ 暂无战力记录\n💡 使用【王者主页】查询后会自动记录战力数据"
+                )
+                return
+
+            role_name = history.get_role_name(role_id)
+
+            def fmt(value, default="-"):
+                return default if value is None else value
+
+            def time_label(timestamp, pattern):
+                return datetime.fromtimestamp(timestamp).strftime(pattern)
+
+            first, latest = points[0], points[-1]
+            power_delta = (latest["power"] or 0) - (first["power"] or 0)
+            games_delta = (latest["total"] or 0) - (first["total"] or 0)
+
+            info_lines = [
+                f"📈 【{role_name} 战力趋势】",
+                f"营地ID: {camp_id}",
+                ""
+            ]
+            for point in points:
+                win_rate = "-" if point["win_rate"] is None else f"{point['win_rate']}%"
+                info_lines.append(
+                    f"{time_label(point['time'], '%m-%d %H:%M')} | 战力 {fmt(point['power'])} | "
+                    f"场次 {fmt(point['total'])} | 胜率 {win_rate}"
+                )
+            info_lines.extend([
+                "",
+                f"⚡ 区间变化: {'+' if power_delta > 0 else ''}{power_delta}",
+                f"📊 新增场次: {games_delta}"
+            ])
+
+            powers = [p["power"] for p in points if p["power"] is not None]
+            low, high = min(powers), max(powers)
+            span = (high - low) or 1
+
+            template_data = {
+                "roleName": role_name,
+                "startTime": time_label(first["time"], "%Y/%m/%d"),
+                "endTime": time_label(latest["time"], "%Y/%m/%d"),
+                "latestPower": fmt(latest["power"]),
+                "powerDelta": power_delta,
+                "gamesDelta": games_delta,
+                "points": [
+                    {
+                        # 保留 20% 的底部高度，避免最低点不可见
+                        "height": 20 + int(((p["power"] or low) - low) / span * 80),
+                        "label": time_label(p["time"], "%m-%d")
+                    }
+                    for p in points
+                ],
+                "rows": [
+                    {
+                        "time": time_label(p["time"], "%m-%d %H:%M"),
+                        **{key: fmt(p[key]) for key in ("power", "total", "win_rate", "mvp", "star_5v5", "star_10v10")}
+                    }
+                    for p in reversed(points[-10:])
+                ]
+            }
+
+            async for result in self.plugin.render_reply(
+                event, "power_trend.html", template_data, "\n".join(info_lines), "战力趋势", self._get_render_options()
+            ):
+                yield result
+
+        except Exception as e:
+            logger.error(f"查询战力趋势失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 查询失败: {str(e)}")
+
+    async def get_account_overview(self, user_id: str, event):
+        """全部账号概览：并发获取所有绑定账号的资料和最近战绩，合成一张图"""
+        try:
+            account_manager = self.plugin.account_manager
+            camp_ids = account_manager.get_ids(user_id)
+            if not camp_ids:
+                yield event.plain_result("❌ 请先绑定营地ID\n使用: 绑定营地 [ID]")
+                return
+            
+            current_id = account_manager.get_current_id(user_id)
+            try:
+                concurrency = max(1, int(self.plugin.config.get("query_concurrency", 4)))
+            except (ValueError, TypeError):
+                concurrency = 4
+            
+            # 资料和战绩同时获取，均复用短时间内的缓存
+            profiles, battle_lists = await asyncio.gather(
+                api_service.fetch_profiles(camp_ids, concurrency=concurrency, max_age=30),
+                api_service.fetch_battle_lists(camp_ids, concurrency=concurrency, max_age=30)
+            )
+            
+            accounts = []
+            info_lines = ["📋 【全部账号概览】", ""]
+            for i, camp_id in enumerate(camp_ids, 1):
+                profile = profiles.get(camp_id)
+                battles = battle_lists.get(camp_id, [])[:10]
+                account = {
+                    "index": i,
+                    "campId": camp_id,
+                    "current": camp_id == current_id,
+                    "ok": profile is not None,
+                    "recent": [
+                        {
+                            "isWin": battle.is_win,
+                            "heroIcon": battle.hero_icon,
+                            "heroName": battle.hero_name,
+                            "kda": battle.kda
+                        }
+                        for battle in battles
+                    ],
+                    "recentWins": sum(1 for battle in battles if battle.is_win)
+                }
+                
+                prefix = "✅" if account["current"] else "☑️"
+                if profile is None:
+                    accounts.append(account)
+                    info_lines.append(f"{prefix} {i}. {camp_id} | ❌ 获取数据失败")
+                    continue
+                
+                self.plugin.profile_history.record_profile(camp_id, profile)
+                role = profile.role(profile.target_role_id) or profile.default_role
+                rank_mod = profile.mod(701)
+                account.update({
+                    "name": role.role_name if role else "未知",
+                    "server": role.server_name if role else "未知",
+                    "icon": role.role_icon if role else "",
+                    "rankName": rank_mod.name if rank_mod else "未知",
+                    "rankStar": ((rank_mod.param or {}).get("rankingStar", 0)) if rank_mod else 0,
+                    "power": profile.mod_content(304),
+                    "total": profile.mod_content(401),
+                    "winRate": profile.mod_content(409)
+                })
+                accounts.append(account)
+                
+                info_lines.append(
+                    f"{prefix} {i}. {account['name']} ({account['server']}) | 战力 {account['power']} | "
+                    f"{account['rankName']} {account['rankStar']}星 | 胜率 {account['winRate']}"
+                )
+                if battles:
+                    info_lines.append(f"   最近{len(battles)}场: {account['recentWins']}胜{len(battles) - account['recentWins']}负")
+            
+            info_lines.extend(["", "💡 使用【切换营地 序号】切换当前账号"])
+            
+            template_data = {
+                "accounts": accounts,
+                "updateTime": datetime.now().strftime("%Y-%m-%d %H:%M")
+            }
+            async for result in self.plugin.render_reply(
+                event, "account_overview.html", template_data, "\n".join(info_lines), "账号概览", self._get_render_options()
+            ):
+                yield result
+            
+        except Exception as e:
+            logger.error(f"获取账号概览失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 查询失败: {str(e)}")
+
+    async def query_battle_stats(self, camp_id: str, event, index: Optional[int] = None, page: int = 1):
+        """查询战绩，指定序号时查询单场详情，否则按页显示战绩列表"""
         try:
-            # 获取战绩列表
-            battle_data = await api_service.get_more_battle_list(camp_id)
+            # 获取战绩列表（与推送任务共用缓存，稍旧的缓存先返回并后台刷新，接口异常时回退到旧缓存）
+            battle_list, fetched_at = await api_service.fetch_battles_swr(camp_id, **self._get_cache_policy())
+            data_time = self._format_data_time(fetched_at)
             
-            if not battle_data.get("data") or not battle_data["data"].get("list"):
+            if not battle_list:
                 yield event.plain_result("❌ 未查询到战绩数据")
                 return
             
-            battle_list = battle_data["data"]["list"]
-            
             # 如果指定了序号，查询单场详情
             if index is not None:
                 if index < 1 or index > len(battle_list):
@@ -404,107 +507,122 @@ class GameStatsQuery:
                     yield result
                 return
             
-            # 显示战绩列表（文本版本，用于回退）
+            # 分页显示战绩列表
+            battle_list = battle_list[:MAX_BATTLES]
+            page_size = self._get_page_size()
+            total_pages = max(1, math.ceil(len(battle_list) / page_size))
+            if page < 1 or page > total_pages:
+                yield event.plain_result(f"❌ 页码超出范围，当前共{total_pages}页战绩")
+                return
+            
+            # 文本版本，用于回退
             info_lines = [
                 "📊 【最近战绩】",
                 f"营地ID: {camp_id}",
                 ""
             ]
-            
-            for i, battle in enumerate(battle_list[:15], 1):  # 只显示前15场
-                result = "✅胜利" if battle.get("isWin") == 1 else "❌失败"
-                hero_name = battle.get("heroName", "未知")
-                kda = f"{battle.get('killNum', 0)}/{battle.get('deadNum', 0)}/{battle.get('assistNum', 0)}"
-                map_name = battle.get("mapName", "未知")
+            if data_time:
+                info_lines.insert(2, f"🕒 数据时间: {data_time}")
+            if total_pages > 1:
+                info_lines.insert(2, f"📄 第 {page}/{total_pages} 页")
+            
+            first = (page - 1) * page_size
+            for i, battle in enumerate(battle_list[first:first + page_size], first + 1):
+                result = "✅胜利" if battle.is_win else "❌失败"
                 
                 info_lines.append(
-                    f"{i}. {result} | {hero_name} | {kda} | {map_name}"
+                    f"{i}. {result} | {battle.hero_name} | {battle.kda} | {battle.map_name}"
                 )
             
             info_lines.extend([
                 "",
                 "💡 使用【查询战绩 [序号]】查看详细数据",
-                f"💡 例如: 查询战绩 1"
+                f"💡 例如: 查询战绩 {first + 1}"
             ])
+            if page < total_pages:
+                info_lines.append(f"💡 使用【查询战绩 第{page + 1}页】查看下一页")
             
-            # 使用HTML渲染
-            try:
-                # 处理战绩数据
-                processed_data = []
-                for battle in battle_list[:30]:
-
-                    tags = []
-                    desc = battle.get("desc", "")
-                    if desc:
-                        tags = [tag.strip() for tag in desc.split(",") if tag.strip()]
-                    
-
-                    game_time = battle.get("gametime", "")
-                    if game_time:
-                        try:
-                            dt = datetime.strptime(game_time, "%Y-%m-%d %H:%M:%S")
-                            game_time = dt.strftime("%m-%d %H:%M")
-                        except:
-                            pass
-                    
-
-                    used_time = battle.get("usedTime", 0)
-                    minutes = used_time // 60
-                    seconds = used_time % 60
-                    game_duration = f"{minutes}分{seconds}秒"
-                    
-                    processed_data.append({
-                        "gameType": battle.get("mapName", "未知"),
-                        "gameTime": game_time,
-                        "gameDuration": game_duration,
-                        "gameResult": "胜利" if battle.get("isWin") == 1 else "失败",
-                        "killCnt": battle.get("killNum", 0),
-                        "deadCnt": battle.get("deadNum", 0),
-                        "assistCnt": battle.get("assistNum", 0),
-                        "heroIcon": battle.get("heroIcon", ""),
-                        "tags": tags,
-                        "gradeGame": battle.get("score", 0)
-                    })
-                
-                template_data = {
-                    "data": processed_data
-                }
-                
-                # 读取HTML模板（从插件根目录）
-                plugin_root = os.path.dirname(os.path.dirname(__file__))
-                template_path = os.path.join(plugin_root, "templates", "battle_list.html")
-                with open(template_path, "r", encoding="utf-8") as f:
-                    html_template = f.read()
-                
-                # 使用 html_render 渲染HTML模板为图片
-                # 使用配置中的渲染选项
-                url = await self.plugin.html_render(html_template, template_data, options=self._get_render_options())
-                yield event.image_result(url)
-            except Exception as e:
-                logger.error(f"战绩渲染图片失败，使用文本回退，错误: {e}", exc_info=True)
-                text = "\n".join(info_lines)
-                yield event.plain_result(text)
+            # 使用HTML渲染，使用配置中的渲染选项
+            template_data = self._build_battle_page(battle_list, page, page_size, data_time)
+            async for result in self.plugin.render_reply(
+                event, "battle_list.html", template_data, "\n".join(info_lines), "战绩", self._get_render_options()
+            ):
+                yield result
+            
+            if page < total_pages:
+                self._prerender_battle_page(self._build_battle_page(battle_list, page + 1, page_size, data_time))
             
         except Exception as e:
             logger.error(f"查询战绩失败: {e}")
             yield event.plain_result(f"❌ 查询失败: {str(e)}")
 
-    async def _get_battle_detail(self, camp_id: str, battle: dict, index: int, event):
+    def _get_page_size(self) -> int:
+        """获取每页战绩条数"""
+        try:
+            return max(1, min(MAX_BATTLES, int(self.plugin.config.get("battle_page_size", 10))))
+        except (ValueError, TypeError):
+            return 10
+
+    def _build_battle_page(self, battle_list: List[Battle], page: int, page_size: int, data_time: str) -> dict:
+        """构建一页战绩的模板数据"""
+        first = (page - 1) * page_size
+        processed_data = []
+        for index, battle in enumerate(battle_list[first:first + page_size], first + 1):
+            game_time = battle.gametime
+            if game_time:
+                try:
+                    dt = datetime.strptime(game_time, "%Y-%m-%d %H:%M:%S")
+                    game_time = dt.strftime("%m-%d %H:%M")
+                except:
+                    pass
+            
+            processed_data.append({
+                "index": index,
+                "gameType": battle.map_name,
+                "gameTime": game_time,
+                "gameDuration": self._format_duration(battle.used_time),
+                "gameResult": "胜利" if battle.is_win else "失败",
+                "killCnt": battle.kill_num,
+                "deadCnt": battle.dead_num,
+                "assistCnt": battle.assist_num,
+                "heroIcon": battle.hero_icon,
+                "tags": battle.tags,
+                "gradeGame": battle.score
+            })
+        
+        return {
+            "data": processed_data,
+            "dataTime": data_time,
+            "page": page,
+            "totalPages": max(1, math.ceil(len(battle_list) / page_size)),
+            "bgUrl": BATTLE_LIST_BG_URL,
+            "logoUrl": LOGO_URL
+        }
+
+    def _prerender_battle_page(self, template_data: dict):
+        """在后台以低优先级预渲染下一页，结果写入渲染缓存"""
+        if self.plugin.render_cache is None:
+            return
+        
+        async def prerender():
+            try:
+                await self.plugin.render_template(
+                    "battle_list.html",
+                    template_data,
+                    options=self._get_render_options(),
+                    priority=PRIORITY_BACKGROUND
+                )
+            except Exception as e:
+                logger.debug(f"预渲染战绩第{template_data['page']}页失败: {e}")
+        
+        task = asyncio.create_task(prerender())
+        self._prerender_tasks.add(task)
+        task.add_done_callback(self._prerender_tasks.discard)
+
+    async def _get_battle_detail(self, camp_id: str, battle: Battle, index: int, event):
         """获取单场战斗详情"""
         try:
-            # 提取必要参数
-            battle_type = battle.get("battleType")
-            game_svr_id = battle.get("gameSvrId")
-            relay_svr_id = battle.get("relaySvrId")
-            game_seq = battle.get("gameSeq")
-            
-            battle_url = battle.get("battleDetailUrl", "")
-            match = re.search(r"toAppRoleId=(\d+)", battle_url)
-            target_role_id = match.group(1) if match else "0"
-            
-            detail_data = await api_service.get_battle_detail(
-                camp_id, battle_type, game_svr_id, relay_svr_id, target_role_id, game_seq
-            )
+            detail_data = await api_service.fetch_battle_detail(camp_id, battle)
             
             if not detail_data.get("data"):
                 yield event.plain_result("❌ 获取战斗详情失败")
@@ -512,19 +630,19 @@ class GameStatsQuery:
             
             detail = detail_data["data"]
             
-            result = "✅ 胜利" if battle.get("isWin") == 1 else "❌ 失败"
+            result = "✅ 胜利" if battle.is_win else "❌ 失败"
             info_lines = [
                 f"🎮 【战绩详情 #{index}】",
                 "",
                 f"📌 结果: {result}",
-                f"🦸 英雄: {battle.get('heroName', '未知')}",
-                f"🗺️ 地图: {battle.get('mapName', '未知')}",
-                f"⏱️ 时长: {self._format_duration(battle.get('usedTime', 0))}",
+                f"🦸 英雄: {battle.hero_name}",
+                f"🗺️ 地图: {battle.map_name}",
+                f"⏱️ 时长: {self._format_duration(battle.used_time)}",
                 "",
                 "📊 数据统计:",
-                f"⚔️ 击杀: {battle.get('killNum', 0)}",
-                f"💀 死亡: {battle.get('deadNum', 0)}",
-                f"🤝 助攻: {battle.get('assistNum', 0)}",
+                f"⚔️ 击杀: {battle.kill_num}",
+                f"💀 死亡: {battle.dead_num}",
+                f"🤝 助攻: {battle.assist_num}",
                 f"💰 金币: {detail.get('totalMoney', 0)}",
                 f"🏅 评分: {detail.get('score', 0)}",
                 f"🎯 伤害: {detail.get('hurt', 0)}",
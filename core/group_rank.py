@@ -0,0 +1,126 @@
+"""
+群排行模块
+汇总群内已绑定用户的主页数据，按战力、段位星数、胜率排名
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+from astrbot.api import logger
+from .api_service import api_service
+from .profile_history import ProfileHistory
+
+
+class GroupRankQuery:
+    """群排行查询类"""
+
+    def __init__(self, plugin_instance):
+        self.plugin = plugin_instance
+        # 群号 -> (生成时间, 参与排行的营地ID, 模板数据, 文本回退)
+        # 只缓存排行数据，图片每次经渲染缓存获取，负载恢复后不会一直返回降级的结果
+        self._cache: Dict[str, Tuple[float, tuple, Dict, str]] = {}
+
+    def _get_render_options(self):
+        """获取图片渲染配置选项"""
+        return self.plugin.get_render_options()
+
+    def _get_int_config(self, key: str, default: int, minimum: int) -> int:
+        """读取整数配置项"""
+        try:
+            return max(minimum, int(self.plugin.config.get(key, default)))
+        except (ValueError, TypeError):
+            return default
+
+    async def get_group_rank(self, group_id: str, event):
+        """查看群排行"""
+        try:
+            camp_ids = self.plugin.account_manager.get_group_camp_ids(group_id)
+            if not camp_ids:
+                yield event.plain_result(
+                    "❌ 本群暂无已绑定营地ID的成员\n💡 成员在群内使用【绑定营地】或【王者主页】后会加入群排行"
+                )
+                return
+
+            # 短时间内重复请求且成员未变化时直接复用上次的结果
+            ttl = self._get_int_config("group_rank_ttl", 300, 0)
+            members = tuple(sorted(camp_ids))
+            cached = self._cache.get(str(group_id))
+            if cached and cached[1] == members and time.time() - cached[0] <= ttl:
+                logger.debug(f"使用缓存的群排行，群号: {group_id}")
+                async for result in self._reply(event, cached[2], cached[3]):
+                    yield result
+                return
+
+            # 并发获取成员资料，ttl 内的缓存资料直接复用
+            profiles = await api_service.fetch_profiles(
+                list(camp_ids),
+                concurrency=self._get_int_config("query_concurrency", 4, 1),
+                max_age=ttl
+            )
+            if not profiles:
+                yield event.plain_result("❌ 获取群成员数据失败，请稍后重试")
+                return
+
+            entries = []
+            for camp_id, profile in profiles.items():
+                self.plugin.profile_history.record_profile(camp_id, profile)
+                entries.append(self._build_entry(camp_id, profile))
+
+            entries.sort(
+                key=lambda e: tuple(-1 if e[k] is None else e[k] for k in ("power", "star_5v5", "win_rate")),
+                reverse=True
+            )
+            for rank, entry in enumerate(entries, 1):
+                entry["rank"] = rank
+
+            info_lines = ["🏆 【群排行】", ""]
+            for entry in entries:
+                win_rate = "-" if entry["win_rate"] is None else f"{entry['win_rate']}%"
+                info_lines.append(
+                    f"{entry['rank']}. {entry['name']} | 战力 {self._fmt(entry['power'])} | "
+                    f"{entry['rankName']} {self._fmt(entry['star_5v5'])}星 | 胜率 {win_rate}"
+                )
+            if len(profiles) < len(camp_ids):
+                info_lines.extend(["", f"⚠️ {len(camp_ids) - len(profiles)} 名成员数据获取失败"])
+            text = "\n".join(info_lines)
+
+            template_data = {
+                "entries": entries,
+                "total": len(entries),
+                "updateTime": datetime.now().strftime("%Y-%m-%d %H:%M")
+            }
+            self._cache[str(group_id)] = (time.time(), members, template_data, text)
+            async for result in self._reply(event, template_data, text):
+                yield result
+
+        except Exception as e:
+            logger.error(f"查询群排行失败，群号: {group_id}, 错误: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 查询失败: {str(e)}")
+
+    def _reply(self, event, template_data: Dict, text: str):
+        """渲染排行图片，渲染失败或负载降级时回退为文本"""
+        return self.plugin.render_reply(
+            event, "group_rank.html", template_data, text, "群排行", self._get_render_options()
+        )
+
+    @staticmethod
+    def _fmt(value, default="-"):
+        return default if value is None else value
+
+    @staticmethod
+    def _build_entry(camp_id: str, profile) -> Dict:
+        """提取排行所需的数据（主页数据对应 targetRoleId 角色）"""
+        snapshot = ProfileHistory.snapshot_from_profile(profile)
+        role = profile.role(profile.target_role_id) or profile.default_role
+        rank_mod = profile.mod(701)
+        return {
+            "campId": camp_id,
+            "name": role.role_name if role else camp_id,
+            "server": role.server_name if role else "",
+            "icon": role.role_icon if role else "",
+            "rankName": rank_mod.name if rank_mod else "未知",
+            "power": snapshot.get("power"),
+            "star_5v5": snapshot.get("star_5v5"),
+            "win_rate": snapshot.get("win_rate"),
+            "total": snapshot.get("total")
+        }
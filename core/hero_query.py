@@ -3,7 +3,6 @@
 处理英雄战力、皮肤等查询
 """
 
-import os
 import aiohttp
 from astrbot.api import logger
 from .api_service import api_service
@@ -122,18 +121,10 @@ class HeroQuery:
                 "data": platform_list
             }
             
-            try:
-                plugin_root = os.path.dirname(os.path.dirname(__file__))
-                template_path = os.path.join(plugin_root, "templates", "hero_power.html")
-                with open(template_path, "r", encoding="utf-8") as f:
-                    html_template = f.read()
-                
-                url = await self.plugin.html_render(html_template, template_data, options=self._get_render_options())
-                yield event.image_result(url)
-            except Exception as e:
-                logger.error(f"战力渲染图片失败，使用文本回退，错误: {e}", exc_info=True)
-                text = "\n".join(info_lines)
-                yield event.plain_result(text)
+            async for result in self.plugin.render_reply(
+                event, "hero_power.html", template_data, "\n".join(info_lines), "战力", self._get_render_options()
+            ):
+                yield result
             
         except Exception as e:
             logger.error(f"查询英雄战力失败: {e}")
@@ -220,20 +211,10 @@ class HeroQuery:
                 "skinData": skin_data
             }
             
-            try:
-                # 读取HTML模板（从插件根目录）
-                plugin_root = os.path.dirname(os.path.dirname(__file__))
-                template_path = os.path.join(plugin_root, "templates", "hero_skin.html")
-                with open(template_path, "r", encoding="utf-8") as f:
-                    html_template = f.read()
-                
-                # 使用 html_render 渲染HTML模板为图片
-                url = await self.plugin.html_render(html_template, template_data, options=self._get_render_options())
-                yield event.image_result(url)
-            except Exception as e:
-                logger.error(f"皮肤渲染图片失败，使用文本回退，错误: {e}", exc_info=True)
-                text = "\n".join(info_lines)
-                yield event.plain_result(text)
+            async for result in self.plugin.render_reply(
+                event, "hero_skin.html", template_data, "\n".join(info_lines), "皮肤", self._get_render_options()
+            ):
+                yield result
             
         except Exception as e:
             logger.error(f"查询英雄皮肤失败: {e}")
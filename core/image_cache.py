@@ -0,0 +1,268 @@
+"""
+远程图片缓存模块
+渲染前把模板数据中的远程图片（英雄头像、段位图标等）下载到本地缓存，
+并改写为本地地址，渲染器不再每次从 CDN 重新获取
+"""
+
+import asyncio
+import base64
+import hashlib
+import mimetypes
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+import aiohttp
+from astrbot.api import logger
+from .metrics import metrics
+
+
+# 视为图片地址的字段名
+IMAGE_KEY_PATTERN = re.compile(r"icon|img|image|avatar|logo|bg", re.I)
+
+# 图片扩展名，字段名不匹配但地址以这些扩展名结尾时同样缓存
+IMAGE_URL_PATTERN = re.compile(r"^https?://\S+\.(?:png|jpe?g|gif|webp)(?:\?\S*)?$", re.I)
+
+# 部分系统的 mimetypes 未登记 webp，下载的 WebP 图片需按扩展名还原类型
+mimetypes.add_type("image/webp", ".webp")
+
+# 下载失败的地址在该时间内不再重试（秒）
+FAILURE_TTL = 300
+
+# data_uri 模式下在内存中保留的已编码图片总长度上限（字符）
+ENCODED_CACHE_SIZE = 16 * 1024 * 1024
+
+
+class RemoteImageCache:
+    """远程图片的本地磁盘缓存"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        ttl: float = 7 * 86400,
+        max_image_bytes: int = 2 * 1024 * 1024,
+        mode: str = "data_uri",
+        concurrency: int = 8,
+        timeout: float = 5
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_image_bytes = max_image_bytes
+        self.mode = mode
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        # 地址哈希 -> (文件路径, 文件大小)，按最近使用顺序排列
+        self._entries: "OrderedDict[str, Tuple[Path, int]]" = OrderedDict()
+        self._total = 0
+        # 地址 -> 下载失败时间
+        self._failed: Dict[str, float] = {}
+        # 同一地址并发请求时只下载一次
+        self._pending: Dict[str, asyncio.Future] = {}
+        # 文件路径 -> (修改时间, data URI)，按最近使用顺序排列，避免每次渲染重新读取和编码
+        self._encoded: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._encoded_size = 0
+        # 缓存自有的会话，下载不依赖发起请求的渲染是否被取消
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._load()
+
+    def _load(self):
+        """启动时恢复磁盘上的缓存"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path.stem] = (path, size)
+            self._total += size
+        self._evict()
+
+    @staticmethod
+    def _is_image_url(key: str, value: Any) -> bool:
+        """判断字段是否为远程图片地址"""
+        if not isinstance(value, str) or not value.startswith(("http://", "https://")):
+            return False
+        return bool(IMAGE_KEY_PATTERN.search(key) or IMAGE_URL_PATTERN.match(value))
+
+    def _collect(self, data: Any, urls: Set[str], key: str = ""):
+        """收集模板数据中的远程图片地址"""
+        if isinstance(data, dict):
+            for k, v in data.items():
+                self._collect(v, urls, str(k))
+        elif isinstance(data, (list, tuple)):
+            for item in data:
+                self._collect(item, urls, key)
+        elif self._is_image_url(key, data):
+            urls.add(data)
+
+    def _rewrite(self, data: Any, sources: Dict[str, str], key: str = "") -> Any:
+        """返回替换了图片地址的新数据，原数据不修改"""
+        if isinstance(data, dict):
+            return {k: self._rewrite(v, sources, str(k)) for k, v in data.items()}
+        if isinstance(data, (list, tuple)):
+            return [self._rewrite(item, sources, key) for item in data]
+        if self._is_image_url(key, data):
+            return sources.get(data, data)
+        return data
+
+    async def localize(self, data: dict, mode: Optional[str] = None) -> dict:
+        """
+        将模板数据中的远程图片替换为本地缓存，下载失败的图片保留原地址
+
+        mode 默认使用初始化时的引用方式，传入 path 时替换为本地文件路径
+        """
+        urls: Set[str] = set()
+        self._collect(data, urls)
+        if not urls:
+            return data
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve(url: str):
+            async with semaphore:
+                return url, await self._get(url)
+
+        results = await asyncio.gather(*(resolve(url) for url in urls))
+
+        sources = {}
+        for url, path in results:
+            source = self._source(path, mode or self.mode) if path else None
+            if source:
+                sources[url] = source
+        return self._rewrite(data, sources)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取下载用的会话（首次使用时创建）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        """关闭下载用的会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get(self, url: str) -> Optional[Path]:
+        """获取单张图片的本地文件，失败时返回 None"""
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        entry = self._entries.get(key)
+        if entry and entry[0].is_file() and time.time() - entry[0].stat().st_mtime <= self.ttl:
+            self._entries.move_to_end(key)
+            metrics.incr("image_cache.hit")
+            return entry[0]
+
+        failed_at = self._failed.get(url)
+        if failed_at and time.time() - failed_at <= FAILURE_TTL:
+            return entry[0] if entry and entry[0].is_file() else None
+
+        pending = self._pending.get(key)
+        if pending is None:
+            metrics.incr("image_cache.miss")
+            pending = self._pending[key] = asyncio.ensure_future(self._download(url, key))
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        path = await asyncio.shield(pending)
+
+        # 下载失败时，过期的旧图片仍可使用
+        if path is None and entry and entry[0].is_file():
+            path = entry[0]
+        return path
+
+    async def _download(self, url: str, key: str) -> Optional[Path]:
+        """下载图片并写入缓存"""
+        try:
+            async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+                if response.status != 200 or not content_type.startswith("image/"):
+                    raise ValueError(f"HTTP {response.status}, {content_type or '未知类型'}")
+                if (response.content_length or 0) > self.max_image_bytes:
+                    raise ValueError(f"图片过大: {response.content_length} 字节")
+                body = await response.content.read(self.max_image_bytes + 1)
+                if len(body) > self.max_image_bytes:
+                    raise ValueError("图片过大")
+        except Exception as e:
+            metrics.incr("image_cache.fail")
+            self._failed[url] = time.time()
+            logger.debug(f"缓存远程图片失败，使用原地址: {url}, 错误: {e}")
+            return None
+
+        self._failed.pop(url, None)
+        self._discard(key)
+        suffix = mimetypes.guess_extension(content_type) or ".img"
+        path = self.cache_dir / f"{key}{suffix}"
+        try:
+            path.write_bytes(body)
+        except OSError as e:
+            logger.warning(f"写入远程图片缓存失败: {e}")
+            return None
+
+        self._entries[key] = (path, len(body))
+        self._total += len(body)
+        self._evict(keep=key)
+        return path
+
+    def _source(self, path: Path, mode: str) -> Optional[str]:
+        """本地图片的引用地址"""
+        if mode == "path":
+            return str(path)
+        if mode == "file":
+            return path.as_uri()
+
+        # data URI 按文件路径和修改时间复用，文件被重新下载后重新编码
+        name = str(path)
+        try:
+            mtime = path.stat().st_mtime_ns
+            cached = self._encoded.get(name)
+            if cached and cached[0] == mtime:
+                self._encoded.move_to_end(name)
+                return cached[1]
+            mime = mimetypes.guess_type(path.name)[0] or "image/png"
+            source = f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+        except OSError as e:
+            logger.debug(f"读取远程图片缓存失败: {e}")
+            return None
+
+        self._forget_encoded(name)
+        self._encoded[name] = (mtime, source)
+        self._encoded_size += len(source)
+        while self._encoded_size > ENCODED_CACHE_SIZE and len(self._encoded) > 1:
+            self._forget_encoded(next(iter(self._encoded)))
+        return source
+
+    def _forget_encoded(self, name: str):
+        """移除已编码的图片"""
+        cached = self._encoded.pop(name, None)
+        if cached:
+            self._encoded_size -= len(cached[1])
+
+    def _evict(self, keep: Optional[str] = None):
+        """淘汰最久未使用的图片直到不超过上限"""
+        while self._total > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._discard(key)
+
+    def _discard(self, key: str):
+        """删除缓存项"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total -= entry[1]
+        self._forget_encoded(str(entry[0]))
+        try:
+            entry[0].unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        return {
+            "count": len(self._entries),
+            "size": self._total,
+            "hit_rate": metrics.ratio("image_cache.hit", "image_cache.miss")
+        }
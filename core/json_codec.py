@@ -0,0 +1,66 @@
+"""
+JSON 编解码模块
+安装了 orjson 时使用 orjson，否则回退到标准库 json
+接口响应直接从 bytes 解码，内部状态文件使用紧凑格式写入
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """解码 JSON，支持直接传入响应的 bytes"""
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """编码为 JSON 字符串（保留中文，默认紧凑格式）"""
+    return dumpb(obj, pretty).decode("utf-8")
+
+
+def dumpb(obj: Any, pretty: bool = False) -> bytes:
+    """编码为 UTF-8 bytes（保留中文，默认紧凑格式）"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """读取 JSON 文件"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: Union[str, Path], pretty: bool = False):
+    """写入 JSON 文件（内部状态文件默认使用紧凑格式）
+
+    先写入临时文件再原子替换，其他进程同时读取时不会读到写了一半的内容
+    """
+    data = dumpb(obj, pretty)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,64 @@
+"""
+运行指标模块
+记录插件内部的计数和耗时，供【王者状态】查看
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# 每项耗时指标保留的最近样本数，用于计算分位数
+SAMPLE_SIZE = 200
+
+
+class Metrics:
+    """进程内的计数器与耗时统计"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Dict[str, int] = {}
+        # 名称 -> 最近样本 (记录时间, 耗时)
+        self.timings: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    def incr(self, name: str, value: int = 1):
+        """计数器累加"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        """记录一次耗时（秒）"""
+        samples = self.timings.get(name)
+        if samples is None:
+            samples = self.timings[name] = deque(maxlen=SAMPLE_SIZE)
+        samples.append((time.time(), seconds))
+
+    def percentile(self, name: str, percent: float, window: Optional[float] = None) -> float:
+        """获取最近样本的耗时分位数（秒），指定 window 时只统计该时间（秒）内的样本，没有样本时返回 0"""
+        since = time.time() - window if window is not None else 0
+        samples = sorted(seconds for recorded_at, seconds in self.timings.get(name, ()) if recorded_at >= since)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+    def ratio(self, hit: str, miss: str) -> float:
+        """计算命中率"""
+        hits, misses = self.counters.get(hit, 0), self.counters.get(miss, 0)
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def format_lines(self) -> List[str]:
+        """格式化为文本行"""
+        lines = [f"⏱️ 运行时长: {int(time.time() - self.started_at) // 60} 分钟"]
+        for name in sorted(self.counters):
+            lines.append(f"• {name}: {self.counters[name]}")
+        for name in sorted(self.timings):
+            samples = self.timings[name]
+            if samples:
+                lines.append(
+                    f"• {name}: 最近 {len(samples)} 次, "
+                    f"p50 {self.percentile(name, 50) * 1000:.0f}ms, p95 {self.percentile(name, 95) * 1000:.0f}ms"
+                )
+        return lines
+
+
+metrics = Metrics()
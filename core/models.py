@@ -0,0 +1,247 @@
+"""
+数据模型模块
+将主页资料与战绩列表解码为轻量对象：mods 只按 modId 建一次索引，
+param1 在首次访问时才解析并缓存，各指令与推送任务共用同一个解码结果
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional
+from . import json_codec
+
+
+_UNSET = object()
+
+
+class Mod:
+    """主页 head.mods 中的单个数据模块"""
+
+    __slots__ = ("raw", "mod_id", "_param")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self.mod_id = raw.get("modId")
+        self._param = _UNSET
+
+    @property
+    def name(self) -> str:
+        return self.raw.get("name", "")
+
+    @property
+    def content(self) -> str:
+        return self.raw.get("content", "0")
+
+    @property
+    def icon(self) -> str:
+        return self.raw.get("icon", "")
+
+    @property
+    def stype(self) -> Optional[int]:
+        return self.raw.get("stype")
+
+    @property
+    def show_style(self) -> int:
+        return self.raw.get("showStyle", 0)
+
+    @property
+    def param(self) -> Optional[Dict[str, Any]]:
+        """解析后的 param1（首次访问时解析并缓存，解析失败返回 None）"""
+        if self._param is _UNSET:
+            try:
+                param = json_codec.loads(self.raw.get("param1") or "{}")
+                self._param = param if isinstance(param, dict) else None
+            except Exception:
+                self._param = None
+        return self._param
+
+
+class Role:
+    """游戏角色"""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.raw.get(key, default)
+
+    @property
+    def role_id(self) -> Optional[str]:
+        return self.raw.get("roleId")
+
+    @property
+    def role_name(self) -> str:
+        return self.raw.get("roleName", "未知")
+
+    @property
+    def job_name(self) -> str:
+        return self.raw.get("roleJobName", "未知")
+
+    @property
+    def short_job_name(self) -> str:
+        return self.raw.get("shortRoleJobName", "未知")
+
+    @property
+    def server_name(self) -> str:
+        return self.raw.get("serverName", "未知")
+
+    @property
+    def area_name(self) -> str:
+        return self.raw.get("areaName", "未知")
+
+    @property
+    def role_text(self) -> str:
+        return self.raw.get("roleText", "未知")
+
+    @property
+    def role_icon(self) -> str:
+        return self.raw.get("roleIcon", "")
+
+    @property
+    def game_level(self) -> int:
+        return self.raw.get("gameLevel", 0)
+
+    @property
+    def game_online(self) -> int:
+        return self.raw.get("gameOnline", 0)
+
+    @property
+    def online_time(self) -> int:
+        return self.raw.get("onlineTime", 0)
+
+    @property
+    def offline_time(self) -> int:
+        return self.raw.get("offlineTime", 0)
+
+
+class Profile:
+    """营地主页资料（/game/koh/profile）"""
+
+    __slots__ = ("return_code", "result", "raw", "target_role_id", "roles", "mods", "_mods_by_id", "fetched_at")
+
+    def __init__(self, response: Dict[str, Any]):
+        self.return_code = response.get("returnCode")
+        self.result = response.get("result")
+        data = response.get("data")
+        self.raw: Dict[str, Any] = data if isinstance(data, dict) else {}
+        self.target_role_id = self.raw.get("targetRoleId")
+        self.roles = [Role(role) for role in self.raw.get("roleList", [])]
+        self.mods = [Mod(mod) for mod in self.raw.get("head", {}).get("mods", [])]
+        self._mods_by_id = {mod.mod_id: mod for mod in self.mods}
+        self.fetched_at = time.time()
+
+    @property
+    def ok(self) -> bool:
+        """是否包含有效资料"""
+        return bool(self.raw)
+
+    def mod(self, mod_id: int) -> Optional[Mod]:
+        """按 modId 获取数据模块"""
+        return self._mods_by_id.get(mod_id)
+
+    def mod_content(self, mod_id: int, default: str = "0") -> str:
+        """按 modId 获取数据模块的 content"""
+        mod = self._mods_by_id.get(mod_id)
+        return mod.content if mod else default
+
+    def role(self, role_id: Optional[str]) -> Optional[Role]:
+        """按 roleId 获取角色"""
+        if not role_id:
+            return None
+        for role in self.roles:
+            if role.role_id == role_id:
+                return role
+        return None
+
+    @property
+    def default_role(self) -> Optional[Role]:
+        """默认角色：targetRoleId 对应的角色，找不到时取第一个"""
+        return self.role(self.target_role_id) or (self.roles[0] if self.roles else None)
+
+
+class Battle:
+    """战绩列表中的单场战绩（/game/morebattlelist）"""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+
+    @classmethod
+    def list_from_response(cls, response: Dict[str, Any]) -> List["Battle"]:
+        """从接口响应中解码战绩列表"""
+        data = response.get("data") or {}
+        return [cls(item) for item in data.get("list") or []]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.raw.get(key, default)
+
+    @property
+    def game_seq(self) -> Optional[str]:
+        return self.raw.get("gameSeq")
+
+    @property
+    def gametime(self) -> str:
+        return self.raw.get("gametime", "")
+
+    @property
+    def battle_id(self) -> str:
+        """战绩唯一标识"""
+        return f"{self.game_seq}_{self.gametime}"
+
+    @property
+    def match_key(self) -> str:
+        """对局标识，同一对局中所有玩家的战绩相同"""
+        return f"{self.game_seq}_{self.raw.get('gameSvrId', '')}"
+
+    @property
+    def is_win(self) -> bool:
+        return self.raw.get("isWin") == 1
+
+    @property
+    def hero_name(self) -> str:
+        return self.raw.get("heroName", "未知")
+
+    @property
+    def hero_icon(self) -> str:
+        return self.raw.get("heroIcon", "")
+
+    @property
+    def map_name(self) -> str:
+        return self.raw.get("mapName", "未知")
+
+    @property
+    def kill_num(self) -> int:
+        return self.raw.get("killNum", 0)
+
+    @property
+    def dead_num(self) -> int:
+        return self.raw.get("deadNum", 0)
+
+    @property
+    def assist_num(self) -> int:
+        return self.raw.get("assistNum", 0)
+
+    @property
+    def kda(self) -> str:
+        return f"{self.kill_num}/{self.dead_num}/{self.assist_num}"
+
+    @property
+    def score(self) -> Any:
+        return self.raw.get("score", 0)
+
+    @property
+    def used_time(self) -> int:
+        return self.raw.get("usedTime", 0)
+
+    @property
+    def tags(self) -> List[str]:
+        desc = self.raw.get("desc", "")
+        return [tag.strip() for tag in desc.split(",") if tag.strip()] if desc else []
+
+    @property
+    def target_role_id(self) -> str:
+        """从战绩详情链接中解析角色ID"""
+        match = re.search(r"toAppRoleId=(\d+)", self.raw.get("battleDetailUrl", ""))
+        return match.group(1) if match else "0"
@@ -0,0 +1,358 @@
+"""
+原生渲染模块
+使用 Pillow 直接绘制战绩列表和推送卡片，不经过浏览器渲染；
+绘制在进程池中执行，未安装 Pillow、找不到中文字体或绘制失败时回退到 HTML 渲染
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from astrbot.api import logger
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+except ImportError:  # pragma: no cover - 可选依赖
+    Image = None
+
+
+# 常见的中文字体，未配置 native_font_path 时按顺序查找
+FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/wqy-microhei/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+)
+
+# 输出目录中超过该时长的图片视为已发送，清理时删除（秒）；
+# 经渲染缓存的图片会被移走，未开启渲染缓存时由此保证图片不会一直堆积
+OUTPUT_TTL = 600
+
+# 清理输出目录的最短间隔（秒）
+CLEANUP_INTERVAL = 60
+
+# 与 HTML 模板一致的特殊标签（战绩列表中显示在头像下方）
+SPECIAL_TAGS = ("实力局", "翻盘局", "暴走局", "尽力局", "带飞局", "翻车局", "伯仲局")
+
+# 颜色取自对应的 HTML 模板
+LIST_COLORS = {
+    "bg": (245, 247, 252),
+    "card": (255, 255, 255),
+    "text": (44, 62, 80),
+    "primary": (52, 152, 219),
+    "secondary": (0, 184, 212),
+    "win": (46, 204, 113),
+    "loss": (231, 76, 60),
+    "neutral": (127, 140, 141),
+    "win_bg": (234, 250, 241),
+    "loss_bg": (253, 237, 236)
+}
+
+PUSH_COLORS = {
+    "bg": (18, 18, 18),
+    "surface": (30, 30, 30),
+    "text": (224, 224, 224),
+    "white": (255, 255, 255),
+    "primary": (187, 134, 252),
+    "secondary": (3, 218, 198),
+    "win": (46, 204, 113),
+    "loss": (231, 76, 60),
+    "tag_bg": (52, 41, 66)
+}
+
+
+def find_font(configured: str = "") -> Optional[str]:
+    """查找可用的中文字体"""
+    for path in ((configured,) if configured else ()) + FONT_CANDIDATES:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 以下函数在子进程中执行，只依赖 Pillow
+# ---------------------------------------------------------------------------
+
+_fonts: Dict[Tuple[str, int], "ImageFont.FreeTypeFont"] = {}
+
+
+class _Canvas:
+    """按 render_scale 缩放坐标的绘图封装，坐标使用 CSS 像素"""
+
+    def __init__(self, width: int, height: int, scale: int, font_path: str, background):
+        self.scale = scale
+        self.font_path = font_path
+        self.image = Image.new("RGB", (width * scale, height * scale), background)
+        self.draw = ImageDraw.Draw(self.image)
+
+    def font(self, size: int):
+        key = (self.font_path, size * self.scale)
+        if key not in _fonts:
+            _fonts[key] = ImageFont.truetype(self.font_path, size * self.scale)
+        return _fonts[key]
+
+    def box(self, x, y, w, h) -> List[int]:
+        s = self.scale
+        return [round(x * s), round(y * s), round((x + w) * s), round((y + h) * s)]
+
+    def rect(self, x, y, w, h, fill, radius: int = 0):
+        if radius:
+            self.draw.rounded_rectangle(self.box(x, y, w, h), radius=radius * self.scale, fill=fill)
+        else:
+            self.draw.rectangle(self.box(x, y, w, h), fill=fill)
+
+    def text(self, x, y, text, size: int, fill, anchor: str = "la", max_width: Optional[float] = None):
+        font = self.font(size)
+        text = str(text)
+        if max_width is not None:
+            text = self._fit(text, font, max_width * self.scale)
+        self.draw.text((round(x * self.scale), round(y * self.scale)), text, font=font, fill=fill, anchor=anchor)
+
+    def text_width(self, text, size: int) -> float:
+        return self.draw.textlength(str(text), font=self.font(size)) / self.scale
+
+    @staticmethod
+    def _fit(text: str, font, max_width: float) -> str:
+        """超出宽度时截断并加省略号"""
+        if font.getlength(text) <= max_width:
+            return text
+        while text and font.getlength(text + "…") > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    def picture(self, path: str, x, y, w, h, radius: int = 0, cover: bool = False):
+        """粘贴本地图片，文件不可用时不绘制"""
+        if not path or path.startswith(("http://", "https://", "data:")) or not os.path.isfile(path):
+            return False
+        try:
+            with Image.open(path) as source:
+                source = source.convert("RGBA")
+                size = (round(w * self.scale), round(h * self.scale))
+                picture = ImageOps.fit(source, size, Image.LANCZOS) if cover else source.resize(size, Image.LANCZOS)
+        except Exception:
+            return False
+        mask = picture.getchannel("A")
+        if radius:
+            rounded = Image.new("L", size, 0)
+            ImageDraw.Draw(rounded).rounded_rectangle([0, 0, size[0] - 1, size[1] - 1], radius=radius * self.scale, fill=255)
+            mask = Image.composite(mask, rounded, rounded)
+        self.image.paste(picture, (round(x * self.scale), round(y * self.scale)), mask)
+        return True
+
+    def save(self, out_path: str, quality: int):
+        if out_path.endswith(".png"):
+            self.image.save(out_path, "PNG")
+        else:
+            self.image.save(out_path, "JPEG", quality=max(1, min(95, quality)))
+
+
+def _draw_battle_list(data: Dict, canvas_args: Tuple) -> "_Canvas":
+    """绘制战绩列表（对应 battle_list.html）"""
+    rows = data.get("data") or []
+    width, header_h, row_h, gap, pad = 800, 190, 104, 12, 20
+    height = header_h + pad + len(rows) * (row_h + gap) + pad
+    c = _Canvas(width, height, *canvas_args, background=LIST_COLORS["bg"])
+    white = (255, 255, 255)
+
+    # 头部：背景图 + 遮罩 + Logo + 标题
+    c.rect(0, 0, width, header_h + 40, LIST_COLORS["primary"])
+    if c.picture(data.get("bgUrl", ""), 0, 0, width, header_h + 40, cover=True):
+        overlay = Image.new("RGBA", c.image.size, (0, 0, 0, 0))
+        ImageDraw.Draw(overlay).rectangle(c.box(0, 0, width, header_h + 40), fill=(0, 0, 0, 90))
+        c.image.paste(overlay, (0, 0), overlay)
+    c.picture(data.get("logoUrl", ""), width / 2 - 60, 18, 120, 60)
+    c.text(width / 2, 100, "游戏战绩", 30, white, anchor="mm")
+    info = []
+    if data.get("dataTime"):
+        info.append(f"数据时间：{data['dataTime']}")
+    if (data.get("totalPages") or 1) > 1:
+        page = data.get("page", 1)
+        info.append(f"第 {page}/{data['totalPages']} 页")
+    if info:
+        c.text(width / 2, 136, " · ".join(info), 14, white, anchor="mm")
+
+    # 列表
+    c.rect(0, header_h, width, height - header_h, LIST_COLORS["card"], radius=30)
+    y = header_h + pad
+    for item in rows:
+        win = item.get("gameResult") == "胜利"
+        color = LIST_COLORS["win"] if win else LIST_COLORS["loss"]
+        c.rect(pad, y, width - 2 * pad, row_h, LIST_COLORS["win_bg" if win else "loss_bg"], radius=14)
+        c.rect(pad, y + 14, 4, row_h - 28, color)
+
+        if not c.picture(item.get("heroIcon", ""), pad + 16, y + 12, 64, 64, radius=12):
+            c.rect(pad + 16, y + 12, 64, 64, LIST_COLORS["neutral"], radius=12)
+        tags = item.get("tags") or []
+        special = [tag for tag in tags if tag in SPECIAL_TAGS]
+        if special:
+            c.text(pad + 48, y + 90, special[0], 12, color, anchor="mm")
+
+        x = pad + 96
+        title = f"#{item['index']} " if item.get("index") else ""
+        title += item.get("gameResult", "")
+        c.text(x, y + 16, title, 20, color)
+        c.text(x + c.text_width(title, 20) + 12, y + 20, item.get("gameType", ""), 15, LIST_COLORS["secondary"], max_width=200)
+        kda = f"{item.get('killCnt', 0)} / {item.get('deadCnt', 0)} / {item.get('assistCnt', 0)}"
+        c.text(x, y + 54, kda, 24, LIST_COLORS["text"])
+
+        c.text(500, y + 42, item.get("gradeGame", ""), 28, color, anchor="mm")
+        c.text(500, y + 74, "对局评分", 12, LIST_COLORS["neutral"], anchor="mm")
+
+        right = width - pad - 18
+        normal = [tag for tag in tags if tag not in SPECIAL_TAGS]
+        if normal:
+            c.text(right, y + 16, " · ".join(normal[:3]), 13, LIST_COLORS["primary"], anchor="ra", max_width=200)
+        c.text(right, y + 44, item.get("gameDuration", ""), 13, LIST_COLORS["neutral"], anchor="ra")
+        c.text(right, y + 68, item.get("gameTime", ""), 13, LIST_COLORS["neutral"], anchor="ra")
+        y += row_h + gap
+    return c
+
+
+def _draw_battle_push(data: Dict, canvas_args: Tuple) -> "_Canvas":
+    """绘制对局推送卡片（对应 battle_push.html）"""
+    players = data.get("players") or []
+    detail = data.get("detail")
+    width, pad, row_h, gap = 720, 24, 92, 12
+    height = pad + 76 + len(players) * (row_h + gap) + (96 if detail else 0) + pad
+    c = _Canvas(width, height, *canvas_args, background=PUSH_COLORS["bg"])
+
+    # 中文字体通常不含 emoji，标题只绘制地图名
+    c.text(pad, pad, data.get("mapName", ""), 26, PUSH_COLORS["white"], max_width=width - 2 * pad)
+    c.text(pad, pad + 42, f"{data.get('gameTime', '')} · {data.get('duration', '')}", 15, PUSH_COLORS["secondary"])
+
+    y = pad + 76
+    for p in players:
+        color = PUSH_COLORS["win"] if p.get("isWin") else PUSH_COLORS["loss"]
+        c.rect(pad, y, width - 2 * pad, row_h, PUSH_COLORS["surface"], radius=12)
+        c.rect(pad, y, 6, row_h, color)
+        x = pad + 20
+        if c.picture(p.get("heroIcon", ""), x, y + 14, 64, 64, radius=10):
+            x += 80
+        c.text(x, y + 14, p.get("name", ""), 20, PUSH_COLORS["white"], max_width=360)
+        c.text(x, y + 42, p.get("heroName", ""), 15, PUSH_COLORS["text"], max_width=360)
+        tag_x = x
+        for tag in (p.get("tags") or [])[:4]:
+            tag_w = c.text_width(tag, 12) + 16
+            c.rect(tag_x, y + 66, tag_w, 20, PUSH_COLORS["tag_bg"], radius=10)
+            c.text(tag_x + 8, y + 76, tag, 12, PUSH_COLORS["primary"], anchor="lm")
+            tag_x += tag_w + 6
+
+        right = width - pad - 18
+        c.text(right, y + 14, "胜利" if p.get("isWin") else "失败", 20, color, anchor="ra")
+        c.text(right, y + 42, p.get("kda", ""), 18, PUSH_COLORS["white"], anchor="ra")
+        c.text(right, y + 66, f"评分 {p.get('score', '')}", 15, PUSH_COLORS["primary"], anchor="ra")
+        y += row_h + gap
+
+    if detail:
+        box_w = (width - 2 * pad - 2 * gap) / 3
+        items = (
+            (detail.get("totalMoney", 0), f"{detail.get('name', '')} 金币"),
+            (detail.get("hurt", 0), "伤害"),
+            (detail.get("hurtTaken", 0), "承伤")
+        )
+        for i, (value, label) in enumerate(items):
+            x = pad + i * (box_w + gap)
+            c.rect(x, y, box_w, 84, PUSH_COLORS["surface"], radius=12)
+            c.text(x + box_w / 2, y + 32, value, 22, PUSH_COLORS["secondary"], anchor="mm")
+            c.text(x + box_w / 2, y + 62, label, 13, PUSH_COLORS["text"], anchor="mm", max_width=box_w - 16)
+    return c
+
+
+# 支持原生渲染的模板及绘制函数
+NATIVE_TEMPLATES = {
+    "battle_list": _draw_battle_list,
+    "battle_push": _draw_battle_push
+}
+
+
+def _render_in_worker(label: str, data: Dict, scale: int, quality: int, font_path: str, out_path: str) -> Tuple[str, float]:
+    """子进程入口：绘制并保存图片，返回 (图片路径, CPU 耗时)"""
+    started = time.process_time()
+    canvas = NATIVE_TEMPLATES[label](data, (scale, font_path))
+    canvas.save(out_path, quality)
+    return out_path, time.process_time() - started
+
+
+# ---------------------------------------------------------------------------
+
+
+class NativeRenderer:
+    """原生渲染器"""
+
+    def __init__(self, templates: Iterable[str], out_dir: Path, font_path: str = "", workers: int = 2):
+        self.templates = {name for name in templates if name in NATIVE_TEMPLATES}
+        self.out_dir = Path(out_dir)
+        self.workers = max(1, workers)
+        self.font_path = find_font(font_path) if Image is not None else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._last_cleanup = time.time()
+
+        unknown = set(templates) - set(NATIVE_TEMPLATES)
+        if unknown:
+            logger.warning(f"以下模板不支持原生渲染，将使用 HTML 渲染: {', '.join(sorted(unknown))}")
+        if self.templates and Image is None:
+            logger.info("未安装 Pillow，原生渲染不可用，使用 HTML 渲染")
+        elif self.templates and not self.font_path:
+            logger.warning("未找到中文字体，原生渲染不可用，请配置 native_font_path")
+        elif self.templates:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            # 清理上次运行遗留的图片（渲染缓存和推送投递会自行移走或删除）
+            for leftover in self.out_dir.iterdir():
+                if leftover.is_file():
+                    leftover.unlink()
+            logger.info(f"原生渲染已启用: {', '.join(sorted(self.templates))}，字体: {self.font_path}")
+
+    def supports(self, label: str) -> bool:
+        """判断模板是否使用原生渲染"""
+        return label in self.templates and Image is not None and bool(self.font_path)
+
+    async def render(self, label: str, data: Dict, options: Dict) -> Tuple[str, float]:
+        """在进程池中绘制图片，返回 (本地图片路径, CPU 耗时)"""
+        if self._executor is None:
+            # 使用 spawn 启动子进程，不继承宿主进程（事件循环、网络连接、线程）的状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        self._cleanup()
+        quality = int(options.get("quality", 100))
+        suffix = ".png" if quality >= 100 else ".jpg"
+        out_path = str(self.out_dir / f"{label}_{uuid.uuid4().hex}{suffix}")
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            _render_in_worker,
+            label,
+            data,
+            int(options.get("device_scale_factor", 2)),
+            quality,
+            self.font_path,
+            out_path
+        )
+
+    def _cleanup(self):
+        """定期删除输出目录中已过期的图片"""
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        try:
+            for entry in os.scandir(self.out_dir):
+                if entry.is_file() and now - entry.stat().st_mtime > OUTPUT_TTL:
+                    os.unlink(entry.path)
+        except OSError as e:
+            logger.debug(f"清理原生渲染输出失败: {e}")
+
+    def shutdown(self, wait: bool = False):
+        """关闭进程池，wait 为 True 时等待子进程退出"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,216 @@
+"""
+战力历史记录模块
+在已有的主页查询中顺带记录战力、场次、胜率、段位星数等快照，
+按角色保存为紧凑的时间序列，并自动降采样
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from astrbot.api import logger
+from . import json_codec
+from .models import Profile
+
+
+# 快照字段顺序，存储时每个点为 [时间戳, *FIELDS]
+FIELDS = ["power", "total", "mvp", "win_rate", "star_5v5", "star_10v10"]
+
+# 原始数据保留时长（秒），超过后按天降采样
+RAW_RETENTION = 7 * 24 * 3600
+
+# 与上一个点数据相同且间隔小于该值时不重复记录（秒）
+DEDUP_WINDOW = 3600
+
+# 每个角色保留的原始数据点和每日数据点上限
+MAX_RAW_POINTS = 500
+MAX_DAILY_POINTS = 365
+
+# 记录后延迟写盘的时间（秒），期间的多次记录合并为一次写入
+SAVE_DELAY = 30
+
+
+def _to_number(value) -> Optional[float]:
+    """将接口中的字符串数值（如 "52.3%"、"1,234"）转换为数字"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).replace(",", "").replace("%", "").strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+class ProfileHistory:
+    """角色数据时间序列存储"""
+
+    def __init__(self, data_dir: Path):
+        self.data_file = data_dir / "profile_history.json"
+        # role_id -> {"camp_id", "name", "raw": [[ts, ...]], "daily": [[ts, ...]]}
+        self.history: Dict[str, Dict] = {}
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._load_data()
+
+    def _load_data(self):
+        """加载历史数据"""
+        if not os.path.exists(self.data_file):
+            return
+
+        try:
+            self.history = json_codec.load_file(self.data_file)
+        except Exception as e:
+            logger.error(f"加载战力历史数据失败: {e}")
+            self.history = {}
+
+    def _save_data(self):
+        """保存历史数据"""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            json_codec.dump_file(self.history, self.data_file)
+        except Exception as e:
+            logger.error(f"保存战力历史数据失败: {e}")
+
+    def _schedule_save(self):
+        """延迟保存，SAVE_DELAY 内的多次记录只写一次文件；不在事件循环中时立即保存"""
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_data()
+            return
+        self._save_handle = loop.call_later(SAVE_DELAY, self.flush)
+
+    def flush(self):
+        """立即写入尚未保存的记录"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+            self._save_data()
+
+    @staticmethod
+    def snapshot_from_profile(profile: Profile) -> Dict:
+        """从主页资料中提取快照数据"""
+        snapshot = {}
+        for field, mod_id in (("power", 304), ("total", 401), ("mvp", 408), ("win_rate", 409)):
+            mod = profile.mod(mod_id)
+            if mod:
+                snapshot[field] = _to_number(mod.raw.get("content"))
+        for field, mod_id in (("star_5v5", 701), ("star_10v10", 708)):
+            mod = profile.mod(mod_id)
+            if mod:
+                snapshot[field] = _to_number((mod.param or {}).get("rankingStar"))
+        return snapshot
+
+    def record_profile(self, camp_id: str, profile: Profile):
+        """从主页资料中记录快照（head 数据对应 targetRoleId 角色）
+
+        时间取资料的获取时间，从缓存返回的旧资料不会被记为新的数据点
+        """
+        try:
+            role = profile.role(profile.target_role_id)
+            role_name = role.role_name if role else "未知"
+            self.record(
+                camp_id, profile.target_role_id, role_name,
+                self.snapshot_from_profile(profile), now=profile.fetched_at
+            )
+        except Exception as e:
+            logger.error(f"记录战力历史失败: {e}", exc_info=True)
+
+    def record(self, camp_id: str, role_id: str, role_name: str, snapshot: Dict, now: Optional[float] = None):
+        """记录一次快照"""
+        if not role_id or not snapshot or snapshot.get("power") is None:
+            return
+
+        now = int(now or time.time())
+        role_id = str(role_id)
+        series = self.history.setdefault(role_id, {"raw": [], "daily": []})
+        series["camp_id"] = str(camp_id)
+        series["name"] = role_name
+
+        point = [now] + [snapshot.get(field) for field in FIELDS]
+        raw = series["raw"]
+        # 不早于已记录的最新点（如缓存中的旧资料），数据已包含在历史中
+        if raw and now <= raw[-1][0]:
+            return
+        if raw and raw[-1][1:] == point[1:] and now - raw[-1][0] < DEDUP_WINDOW:
+            return
+
+        raw.append(point)
+        self._downsample(series, now)
+        del series["raw"][:-MAX_RAW_POINTS]
+        del series["daily"][:-MAX_DAILY_POINTS]
+        self._schedule_save()
+
+    def _downsample(self, series: Dict, now: int):
+        """将超过保留期的原始数据合并为每日一个点（取当天最后一次快照）"""
+        cutoff = now - RAW_RETENTION
+        raw = series["raw"]
+        if not raw or raw[0][0] >= cutoff:
+            return
+
+        daily = series["daily"]
+        keep = []
+        for point in raw:
+            if point[0] >= cutoff:
+                keep.append(point)
+                continue
+            day = datetime.fromtimestamp(point[0]).date()
+            if daily and datetime.fromtimestamp(daily[-1][0]).date() == day:
+                daily[-1] = point
+            else:
+                daily.append(point)
+        series["raw"] = keep
+
+    def find_role(self, camp_id: str, role_id: Optional[str] = None) -> Optional[str]:
+        """查找营地ID下有记录的角色，优先使用指定角色，否则取最近记录的角色"""
+        camp_id = str(camp_id)
+        if role_id and str(role_id) in self.history:
+            return str(role_id)
+
+        latest_role, latest_ts = None, 0
+        for rid, series in self.history.items():
+            if series.get("camp_id") != camp_id:
+                continue
+            points = series["raw"] or series["daily"]
+            if points and points[-1][0] > latest_ts:
+                latest_role, latest_ts = rid, points[-1][0]
+        return latest_role
+
+    @staticmethod
+    def _bucket(points: List[List], pattern: str) -> List[List]:
+        """按时间格式分桶，每个桶保留最后一个点"""
+        buckets: Dict[str, List] = {}
+        for point in points:
+            buckets[datetime.fromtimestamp(point[0]).strftime(pattern)] = point
+        return list(buckets.values())
+
+    def get_series(self, role_id: str, limit: int = 30) -> List[Dict]:
+        """
+        获取角色的时间序列（按时间升序）
+
+        原始数据按小时合并后接在每日数据之后；点数超过 limit 时全部按天合并，
+        保证展示的区间覆盖每日历史，而不只是最近一两天的原始数据
+        """
+        series = self.history.get(str(role_id))
+        if not series:
+            return []
+
+        points = series["daily"] + self._bucket(series["raw"], "%Y%m%d%H")
+        if len(points) > limit:
+            points = self._bucket(series["daily"] + series["raw"], "%Y%m%d")
+        return [
+            {"time": point[0], **dict(zip(FIELDS, point[1:]))}
+            for point in points[-limit:]
+        ]
+
+    def get_role_name(self, role_id: str) -> str:
+        """获取记录中的角色名称"""
+        return self.history.get(str(role_id), {}).get("name", "未知")
@@ -0,0 +1,52 @@
+"""
+渐进式回复模块
+预计图片渲染较慢时先发送文本摘要，渲染完成后再发送图片；
+预计耗时按该模板最近的渲染耗时和当前渲染排队情况估算
+"""
+
+import math
+from astrbot.api import logger
+from .metrics import metrics
+
+
+class ProgressiveReply:
+    """渐进式回复判断"""
+
+    def __init__(self, plugin_instance):
+        self.plugin = plugin_instance
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.plugin.config.get("progressive_reply", False))
+
+    def _get_threshold(self) -> float:
+        """读取预计耗时阈值（秒）"""
+        try:
+            return max(0.0, float(self.plugin.config.get("progressive_threshold", 3)))
+        except (ValueError, TypeError):
+            return 3.0
+
+    def estimate(self, label: str) -> float:
+        """估算本次渲染耗时（秒），没有历史样本时返回 0"""
+        render_time = metrics.percentile(f"render.{label}", 75)
+        if not render_time:
+            return 0.0
+
+        # 并发已满时需等待前面排队的渲染按批完成
+        scheduler = self.plugin.render_scheduler
+        batches = 0
+        if scheduler.active >= scheduler.max_concurrency:
+            batches = math.ceil((scheduler.queue_depth + 1) / scheduler.max_concurrency)
+        return render_time * (1 + batches)
+
+    def should_send_text(self, name: str, cached: bool) -> bool:
+        """判断是否先发送文本摘要，渲染缓存命中时不发送"""
+        if not self.enabled or cached:
+            return False
+        label = name.rsplit(".", 1)[0]
+        estimate = self.estimate(label)
+        if estimate < self._get_threshold():
+            return False
+        metrics.incr("progressive.text_first")
+        logger.debug(f"预计渲染 {label} 需要 {estimate:.1f} 秒，先发送文本摘要")
+        return True
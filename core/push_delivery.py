@@ -0,0 +1,157 @@
+"""
+战绩推送投递模块
+按推送目标（群聊或私聊会话）缓冲推送内容，窗口期结束后合并为一条消息发送，
+并限制每个目标的发送频率，避免触发平台刷屏限制
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from astrbot.api import logger
+from astrbot.api.event import MessageChain
+
+
+class PushCardCache:
+    """推送卡片缓存：每个推送事件只渲染一次，所有目标复用同一图片，全部目标投递后释放"""
+
+    def __init__(self):
+        # 事件标识 -> {"task": 渲染任务, "pending": 尚未投递的目标}
+        self.cards: Dict[str, Dict] = {}
+        self.stats = {"rendered": 0, "reused": 0, "released": 0}
+
+    async def get_or_render(
+        self,
+        key: str,
+        targets: Iterable[str],
+        render: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """获取事件的卡片图片，未渲染时调用 render 渲染（并发请求共用同一次渲染）"""
+        card = self.cards.get(key)
+        if card is None:
+            card = self.cards[key] = {"task": asyncio.ensure_future(render()), "pending": set()}
+            self.stats["rendered"] += 1
+        else:
+            self.stats["reused"] += 1
+        card["pending"].update(targets)
+
+        try:
+            image = await asyncio.shield(card["task"])
+        except Exception as e:
+            logger.error(f"渲染推送卡片失败，使用文本推送: {e}", exc_info=True)
+            image = None
+
+        if not image:
+            self.cards.pop(key, None)
+        return image
+
+    def release(self, key: str, target: str):
+        """目标投递完成后释放引用，全部目标投递后删除缓存和本地图片"""
+        card = self.cards.get(key)
+        if card is None:
+            return
+        card["pending"].discard(target)
+        if card["pending"]:
+            return
+
+        self.cards.pop(key, None)
+        self.stats["released"] += 1
+        task = card["task"]
+        image = task.result() if task.done() and not task.cancelled() and not task.exception() else None
+        if image and not image.startswith("http") and os.path.isfile(image):
+            try:
+                os.remove(image)
+            except OSError as e:
+                logger.debug(f"删除推送卡片图片失败: {e}")
+
+    def clear(self):
+        """清空缓存"""
+        for card in self.cards.values():
+            card["task"].cancel()
+        self.cards.clear()
+
+
+class PushDispatcher:
+    """战绩推送投递器"""
+
+    def __init__(self, context, window: float = 10, min_send_interval: float = 5):
+        self.context = context
+        self.window = window
+        self.min_send_interval = min_send_interval
+        self.buffers: Dict[str, List[Dict]] = {}  # unified_msg_origin -> 待发送内容
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._last_sent: Dict[str, float] = {}
+        self.stats = {"enqueued": 0, "messages": 0, "failed": 0}
+        self.cards = PushCardCache()
+
+    def enqueue(
+        self,
+        target: str,
+        text: Optional[str],
+        image: Optional[str] = None,
+        card_key: Optional[str] = None
+    ):
+        """加入推送内容，窗口期内同一目标的内容会被合并发送；card_key 为卡片缓存中的事件标识"""
+        self.buffers.setdefault(target, []).append({"text": text, "image": image, "card_key": card_key})
+        self.stats["enqueued"] += 1
+
+        task = self._flush_tasks.get(target)
+        if task is None or task.done():
+            self._flush_tasks[target] = asyncio.create_task(self._flush_later(target))
+
+    async def _flush_later(self, target: str):
+        """等待窗口期和发送间隔后发送合并消息"""
+        try:
+            await asyncio.sleep(self.window)
+
+            wait = self._last_sent.get(target, 0) + self.min_send_interval - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            items = self.buffers.pop(target, [])
+            if items:
+                await self._send(target, items)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"战绩推送投递失败，目标: {target}, 错误: {e}", exc_info=True)
+        finally:
+            self._flush_tasks.pop(target, None)
+            # 发送期间又有新内容进入时，开启下一个窗口
+            if self.buffers.get(target):
+                self._flush_tasks[target] = asyncio.create_task(self._flush_later(target))
+
+    def _build_chain(self, items: List[Dict]) -> MessageChain:
+        """将多条推送内容合并为一条消息"""
+        header = "🎮 【新战绩推送】" if len(items) == 1 else f"🎮 【新战绩推送】共 {len(items)} 条"
+        texts = [item["text"] for item in items if item.get("text")]
+        message = header + "\n\n" + "\n\n——————\n\n".join(texts) if texts else header
+        chain = MessageChain().message(message)
+        for item in items:
+            image = item.get("image")
+            if image:
+                chain = chain.url_image(image) if image.startswith("http") else chain.file_image(image)
+        return chain
+
+    async def _send(self, target: str, items: List[Dict]):
+        """发送合并后的消息"""
+        self._last_sent[target] = time.time()
+        try:
+            await self.context.send_message(target, self._build_chain(items))
+            self.stats["messages"] += 1
+            logger.info(f"战绩推送已发送，目标: {target}, 合并 {len(items)} 条")
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"发送战绩推送失败，目标: {target}, 错误: {e}", exc_info=True)
+        finally:
+            for item in items:
+                if item.get("card_key"):
+                    self.cards.release(item["card_key"], target)
+
+    def stop(self):
+        """停止投递，取消未发送的任务"""
+        for task in list(self._flush_tasks.values()):
+            task.cancel()
+        self._flush_tasks.clear()
+        self.buffers.clear()
+        self.cards.clear()
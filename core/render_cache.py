@@ -0,0 +1,177 @@
+"""
+渲染结果缓存模块
+以 (模板, 模板数据, 渲染选项) 的哈希为键缓存渲染出的图片，
+相同内容的渲染直接返回磁盘上的图片；磁盘占用超过上限时淘汰最久未使用的图片
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from astrbot.api import logger
+from .metrics import metrics
+
+
+def _replace_aliases(data: Any, aliases: Dict[str, str]) -> Any:
+    """将数据中的长字符串（如内嵌的资源 data URI）替换为简短的标识"""
+    if isinstance(data, dict):
+        return {k: _replace_aliases(v, aliases) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_replace_aliases(item, aliases) for item in data]
+    if isinstance(data, str):
+        return aliases.get(data, data)
+    return data
+
+
+def render_key(
+    name: str,
+    template: str,
+    data: dict,
+    options: Optional[dict],
+    aliases: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    计算渲染内容的哈希，模板内容参与计算，模板修改后旧缓存自然失效
+
+    aliases 为 字符串 -> 标识 的映射，命中的字符串（如静态资源的 data URI）按标识参与计算，
+    不必每次序列化和哈希整段内嵌数据
+    """
+    if aliases:
+        data = _replace_aliases(data, aliases)
+    digest = hashlib.sha256()
+    for part in (
+        name,
+        template,
+        json.dumps(data, sort_keys=True, ensure_ascii=False, default=str),
+        json.dumps(options or {}, sort_keys=True, default=str)
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """渲染结果的磁盘 LRU 缓存"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        # 哈希 -> (图片路径, 文件大小)，按最近使用顺序排列
+        self._entries: "OrderedDict[str, Tuple[Path, int]]" = OrderedDict()
+        self._total = 0
+        # 相同内容并发渲染时只渲染一次
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._load()
+
+    def _load(self):
+        """启动时按最近使用时间恢复磁盘上的缓存"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path.stem] = (path, size)
+            self._total += size
+        self._evict()
+        if self._entries:
+            logger.info(f"渲染缓存已加载: {len(self._entries)} 张图片, {self._total / 1024 / 1024:.1f} MB")
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[str]]) -> str:
+        """
+        获取缓存的图片路径，未命中时调用 render 渲染
+
+        render 需返回本地图片路径，图片会被移动到缓存目录
+        """
+        entry = self._entries.get(key)
+        if entry and entry[0].is_file():
+            self._entries.move_to_end(key)
+            self._touch(entry[0])
+            metrics.incr("render_cache.hit")
+            return str(entry[0])
+        if entry:
+            self._discard(key)
+
+        pending = self._pending.get(key)
+        if pending:
+            metrics.incr("render_cache.hit")
+            return await asyncio.shield(pending)
+
+        metrics.incr("render_cache.miss")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            image = await render()
+            image = self._store(key, image)
+            future.set_result(image)
+            return image
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时取出异常，避免未获取异常的警告
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    def _store(self, key: str, image: str) -> str:
+        """将渲染出的图片移入缓存目录，远程地址或文件不存在时原样返回"""
+        if not image or image.startswith("http") or not os.path.isfile(image):
+            return image
+        path = self.cache_dir / f"{key}{Path(image).suffix or '.png'}"
+        try:
+            shutil.move(image, path)
+        except OSError as e:
+            logger.warning(f"写入渲染缓存失败: {e}")
+            return image
+
+        size = path.stat().st_size
+        self._entries[key] = (path, size)
+        self._total += size
+        self._evict(keep=key)
+        return str(path)
+
+    def _evict(self, keep: Optional[str] = None):
+        """淘汰最久未使用的图片直到不超过上限"""
+        while self._total > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._discard(key)
+            metrics.incr("render_cache.evict")
+
+    def _discard(self, key: str):
+        """删除缓存项"""
+        path, size = self._entries.pop(key)
+        self._total -= size
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"删除渲染缓存失败: {e}")
+
+    @staticmethod
+    def _touch(path: Path):
+        """更新文件修改时间，重启后仍能按最近使用顺序淘汰"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def contains(self, key: str) -> bool:
+        """判断内容是否已缓存"""
+        entry = self._entries.get(key)
+        return bool(entry and entry[0].is_file())
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        return {
+            "count": len(self._entries),
+            "size": self._total,
+            "hit_rate": metrics.ratio("render_cache.hit", "render_cache.miss")
+        }
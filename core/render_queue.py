@@ -0,0 +1,111 @@
+"""
+渲染调度模块
+限制同时进行的图片渲染数量，排队时交互指令优先于推送和后台渲染；
+排队过长时直接拒绝，由调用方回退为文本
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, List, Tuple
+from astrbot.api import logger
+from .metrics import metrics
+
+
+# 渲染优先级，数值越小越优先
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PUSH = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PUSH: "push",
+    PRIORITY_BACKGROUND: "background"
+}
+
+# 各优先级可占用的排队长度比例，低优先级的渲染更早被拒绝，给交互指令留出位置
+QUEUE_SHARE = {
+    PRIORITY_INTERACTIVE: 1.0,
+    PRIORITY_PUSH: 0.5,
+    PRIORITY_BACKGROUND: 0.5
+}
+
+
+class RenderQueueFull(Exception):
+    """渲染排队已满"""
+
+
+class RenderScheduler:
+    """带优先级和并发上限的渲染调度器"""
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 10):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        # (优先级, 序号, 等待中的 Future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        """正在排队的渲染数量"""
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def run(
+        self,
+        name: str,
+        render: Callable[[], Awaitable],
+        priority: int = PRIORITY_INTERACTIVE
+    ):
+        """按优先级排队执行渲染，排队已满时抛出 RenderQueueFull"""
+        queued_at = time.perf_counter()
+        await self._acquire(name, priority)
+        started_at = time.perf_counter()
+        metrics.observe("render.wait", started_at - queued_at)
+        try:
+            return await render()
+        finally:
+            elapsed = time.perf_counter() - started_at
+            metrics.observe(f"render.{name}", elapsed)
+            metrics.observe("render.all", elapsed)
+            self._release()
+
+    async def _acquire(self, name: str, priority: int):
+        """获取渲染名额"""
+        if self.active < self.max_concurrency and not self.queue_depth:
+            self.active += 1
+            return
+
+        limit = int(self.max_queue * QUEUE_SHARE.get(priority, 1.0))
+        if self.queue_depth >= limit:
+            metrics.incr(f"render.rejected.{PRIORITY_NAMES.get(priority, priority)}")
+            logger.warning(f"渲染排队已满（{self.queue_depth}），拒绝渲染 {name}")
+            raise RenderQueueFull(f"渲染繁忙，当前排队 {self.queue_depth} 个")
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # 已分到名额但调用方被取消时，把名额交给下一个
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        """释放名额，交给优先级最高的等待者"""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        """调度器状态"""
+        return {
+            "active": self.active,
+            "queued": self.queue_depth,
+            "max_concurrency": self.max_concurrency
+        }
@@ -0,0 +1,79 @@
+"""
+过期缓存复用模块（stale-while-revalidate）
+短时间内的缓存直接返回；稍旧的缓存先返回再在后台刷新；
+接口报错或超时时，在最大过期时间内回退使用旧缓存
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from astrbot.api import logger
+
+
+class StaleWhileRevalidate:
+    """过期缓存复用策略，缓存本身由调用方保存，这里只负责取舍和后台刷新"""
+
+    def __init__(self):
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {"fresh": 0, "revalidate": 0, "miss": 0, "fallback": 0}
+
+    async def get(
+        self,
+        key: str,
+        peek: Callable[[], Optional[Tuple[float, Any]]],
+        load: Callable[[], Awaitable[Any]],
+        valid: Callable[[Any], bool],
+        fresh_ttl: float = 30,
+        revalidate_ttl: float = 300,
+        max_stale: float = 3600
+    ) -> Tuple[Any, float]:
+        """
+        获取数据，返回 (数据, 获取时间)
+
+        peek 返回调用方缓存中的 (获取时间, 数据)，load 请求接口并写入缓存，
+        valid 判断数据是否可用；请求失败且没有可用的旧缓存时返回请求结果或抛出原异常
+        """
+        cached = peek()
+        age = time.time() - cached[0] if cached else None
+
+        if cached and age <= fresh_ttl:
+            self.stats["fresh"] += 1
+            return cached[1], cached[0]
+
+        if cached and age <= revalidate_ttl:
+            self.stats["revalidate"] += 1
+            self._refresh(key, load, valid)
+            return cached[1], cached[0]
+
+        self.stats["miss"] += 1
+        try:
+            value = await load()
+        except Exception as e:
+            if cached and age <= max_stale:
+                self.stats["fallback"] += 1
+                logger.warning(f"请求失败，使用 {int(age)} 秒前的缓存数据: {key}, 错误: {e}")
+                return cached[1], cached[0]
+            raise
+
+        if not valid(value) and cached and age <= max_stale:
+            self.stats["fallback"] += 1
+            logger.warning(f"接口返回数据不可用，使用 {int(age)} 秒前的缓存数据: {key}")
+            return cached[1], cached[0]
+        return value, time.time()
+
+    def _refresh(self, key: str, load: Callable[[], Awaitable[Any]], valid: Callable[[Any], bool]):
+        """在后台刷新缓存，同一 key 同时只刷新一次"""
+        task = self._refreshing.get(key)
+        if task and not task.done():
+            return
+
+        async def refresh():
+            try:
+                if not valid(await load()):
+                    logger.debug(f"后台刷新未获取到可用数据: {key}")
+            except Exception as e:
+                logger.warning(f"后台刷新缓存失败: {key}, 错误: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
@@ -0,0 +1,90 @@
+"""
+模板管理模块
+模板只在首次使用或文件修改后读取，读取时压缩 HTML 空白和 CSS 并缓存，
+渲染时不再读取文件
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+from astrbot.api import logger
+
+
+# 同一模板两次检查文件修改时间的最小间隔（秒）
+CHECK_INTERVAL = 5
+
+_JINJA_TAG = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.S)
+_RAW_BLOCK = re.compile(r"<(script|pre|textarea)\b.*?</\1>", re.S | re.I)
+_STYLE_BLOCK = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.S | re.I)
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r":\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _protect(pattern: re.Pattern, text: str, store: List[str]) -> str:
+    """将匹配的片段替换为占位符，压缩后再还原"""
+    def replace(match):
+        store.append(match.group(0))
+        return f"\x00{len(store) - 1}\x00"
+    return pattern.sub(replace, text)
+
+
+def _restore(text: str, store: List[str]) -> str:
+    """还原占位符"""
+    return re.sub(r"\x00(\d+)\x00", lambda m: store[int(m.group(1))], text)
+
+
+def _minify_css(css: str) -> str:
+    """压缩 CSS：去掉注释和多余空白"""
+    css = _CSS_COMMENT.sub("", css)
+    css = _WHITESPACE.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    css = _CSS_COLON.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(html: str) -> str:
+    """压缩模板：模板标签、script/pre/textarea 保持原样，CSS 压缩，HTML 空白合并"""
+    store: List[str] = []
+    html = _protect(_RAW_BLOCK, html, store)
+    html = _protect(_JINJA_TAG, html, store)
+    html = _HTML_COMMENT.sub("", html)
+    html = _STYLE_BLOCK.sub(lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), html)
+    html = _WHITESPACE.sub(" ", html).strip()
+    # 压缩后若拼出了模板定界符（如 "{" 紧跟 "#id" 或模板标签），补回空格避免被当作模板语法
+    html = re.sub(r"\{(?=[{%#\x00])", "{ ", html)
+    return _restore(html, store)
+
+
+class TemplateManager:
+    """模板加载与缓存"""
+
+    def __init__(self, templates_dir: Path, minify: bool = True):
+        self.templates_dir = Path(templates_dir)
+        self.minify = minify
+        # 模板名 -> (文件修改时间, 上次检查时间, 处理后的模板)
+        self._cache: Dict[str, Tuple[float, float, str]] = {}
+
+    def get(self, name: str) -> str:
+        """获取处理后的模板，文件修改后自动重新加载"""
+        now = time.time()
+        cached = self._cache.get(name)
+        if cached and now - cached[1] < CHECK_INTERVAL:
+            return cached[2]
+
+        path = self.templates_dir / name
+        mtime = os.stat(path).st_mtime
+        if cached and cached[0] == mtime:
+            self._cache[name] = (mtime, now, cached[2])
+            return cached[2]
+
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        template = minify_html(raw) if self.minify else raw
+        self._cache[name] = (mtime, now, template)
+        logger.debug(f"已加载模板 {name}: {len(raw)} -> {len(template)} 字符")
+        return template
@@ -0,0 +1,240 @@
+"""
+多实例协调模块
+多个机器人进程共用同一份数据时，通过本地 SQLite 数据库共享心跳、租约和推送状态，
+按营地ID一致性哈希划分轮询任务，进程退出或失联后其任务自动由其他进程接管
+"""
+
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from astrbot.api import logger
+from . import json_codec
+
+
+# 等待其他进程释放数据库锁的最长时间（秒），调用方在线程中执行，超时后本轮跳过
+BUSY_TIMEOUT = 2
+
+
+class WorkerCoordinator:
+    """基于本地 SQLite 的多进程协调器，无需外部协调服务
+
+    各方法均为阻塞调用，在事件循环中需通过 asyncio.to_thread 执行
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        worker_id: Optional[str] = None,
+        heartbeat_ttl: int = 90,
+        virtual_nodes: int = 64
+    ):
+        self.db_path = str(db_path)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_ttl = heartbeat_ttl
+        self.virtual_nodes = virtual_nodes
+        self._ring: List[int] = []
+        self._ring_owners: List[str] = []
+        self._ring_members: tuple = ()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建数据库连接（自动提交模式，事务手动控制）"""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self):
+        """初始化数据表"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases "
+                "(camp_id TEXT PRIMARY KEY, worker_id TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    # ========== 成员与心跳 ==========
+
+    def heartbeat(self):
+        """上报心跳并清理失联的进程"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO workers (worker_id, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (self.worker_id, now)
+            )
+            removed = conn.execute(
+                "DELETE FROM workers WHERE last_seen < ?", (now - self.heartbeat_ttl,)
+            ).rowcount
+            if removed:
+                logger.info(f"清理了 {removed} 个失联的推送进程，其任务将被重新分配")
+        finally:
+            conn.close()
+
+    def alive_workers(self) -> List[str]:
+        """获取存活的进程列表"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT worker_id FROM workers WHERE last_seen >= ? ORDER BY worker_id",
+                (time.time() - self.heartbeat_ttl,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def leave(self):
+        """主动退出集群，释放所有租约"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM leases WHERE worker_id = ?", (self.worker_id,))
+        finally:
+            conn.close()
+
+    # ========== 一致性哈希 ==========
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def _rebuild_ring(self, members: List[str]):
+        """成员变化时重建哈希环"""
+        members = tuple(members)
+        if members == self._ring_members:
+            return
+
+        points = sorted(
+            (self._hash(f"{member}#{i}"), member)
+            for member in members
+            for i in range(self.virtual_nodes)
+        )
+        self._ring = [point for point, _ in points]
+        self._ring_owners = [member for _, member in points]
+        self._ring_members = members
+
+    def owner_of(self, camp_id: str) -> Optional[str]:
+        """计算营地ID归属的进程"""
+        if not self._ring:
+            return None
+        pos = bisect.bisect(self._ring, self._hash(str(camp_id))) % len(self._ring)
+        return self._ring_owners[pos]
+
+    def owned(self, camp_ids: Iterable[str]) -> List[str]:
+        """筛选出应由当前进程负责的营地ID"""
+        members = self.alive_workers()
+        if self.worker_id not in members:
+            members = sorted(members + [self.worker_id])
+        self._rebuild_ring(members)
+        return [camp_id for camp_id in camp_ids if self.owner_of(camp_id) == self.worker_id]
+
+    # ========== 租约 ==========
+
+    def acquire_lease(self, camp_id: str, ttl: Optional[int] = None) -> bool:
+        """获取营地ID的轮询租约，租约过期或持有者失联时可被接管"""
+        now = time.time()
+        ttl = ttl or self.heartbeat_ttl
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT worker_id, expires_at FROM leases WHERE camp_id = ?", (str(camp_id),)
+            ).fetchone()
+            if row and row[0] != self.worker_id and row[1] > now:
+                holder_alive = conn.execute(
+                    "SELECT 1 FROM workers WHERE worker_id = ? AND last_seen >= ?",
+                    (row[0], now - self.heartbeat_ttl)
+                ).fetchone()
+                if holder_alive:
+                    conn.execute("COMMIT")
+                    return False
+            conn.execute(
+                "INSERT INTO leases (camp_id, worker_id, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(camp_id) DO UPDATE SET worker_id = excluded.worker_id, expires_at = excluded.expires_at",
+                (str(camp_id), self.worker_id, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ========== 共享状态 ==========
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        """读取共享状态"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return json_codec.loads(row[0]) if row else default
+
+    def get_states(self, prefix: str) -> Dict[str, Any]:
+        """读取以 prefix 开头的所有共享状态，返回去掉前缀后的键 -> 值"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {key[len(prefix):]: json_codec.loads(value) for key, value in rows}
+
+    def set_state(self, key: str, value: Any):
+        """写入共享状态"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json_codec.dumps(value))
+            )
+        finally:
+            conn.close()
+
+    def update_state(self, key: str, update: Callable[[Any], Any], default: Any = None) -> Any:
+        """在事务中读取、修改并写回共享状态，多个进程同时修改时不会丢失更新，返回修改后的值"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+            value = update(json_codec.loads(row[0]) if row else default)
+            conn.execute(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json_codec.dumps(value))
+            )
+            conn.execute("COMMIT")
+            return value
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取协调器状态"""
+        return {
+            "worker_id": self.worker_id,
+            "alive_workers": self.alive_workers()
+        }
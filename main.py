@@ -3,14 +3,29 @@ AstrBot 王者荣耀插件
 提供王者荣耀数据查询功能
 """
 
+import asyncio
+from pathlib import Path
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register, StarTools
 from astrbot.api import logger, AstrBotConfig
 
 from .core.account_manager import AccountManager
+from .core.assets import AssetRegistry
+from .core.api_service import api_service
 from .core.game_stats import GameStatsQuery
+from .core.group_rank import GroupRankQuery
 from .core.hero_query import HeroQuery
+from .core.image_cache import RemoteImageCache
 from .core.battle_push import BattlePushManager
+from .core.cooldown import CommandCooldown
+from .core.degradation import DegradationController, RenderDegraded
+from .core.metrics import metrics
+from .core.native_render import NativeRenderer
+from .core.profile_history import ProfileHistory
+from .core.progressive import ProgressiveReply
+from .core.render_cache import RenderCache, render_key
+from .core.render_queue import RenderScheduler, RenderQueueFull, PRIORITY_INTERACTIVE
+from .core.template_manager import TemplateManager
 
 HELP_TEXT = """
 【王者荣耀插件帮助】
@@ -20,13 +35,17 @@ HELP_TEXT = """
 • 切换营地 [序号] - 切换使用的营地ID
 • 删除营地 [序号] - 删除绑定的营地ID
 • 我的ID - 查看已绑定的营地ID列表
+• 全部账号 - 一图查看所有绑定账号的概览
 
 📊 数据查询
 • 王者主页 - 查看游戏信息概览
 • 查询战绩 - 查看最近30场战绩
 • 查询战绩 [序号] - 查看指定场次详细数据
+• 查询战绩 第[页码]页 - 查看后续战绩
 • 查战力 [英雄名] - 查询指定英雄的战力排名
 • 查皮肤 [英雄名] - 查询指定英雄的皮肤
+• 战力趋势 - 查看战力/场次/胜率历史变化
+• 群排行 - 查看本群成员的战力/段位/胜率排行
 
 💡 提示
 • 首次使用请先绑定营地ID
@@ -44,7 +63,24 @@ class GloryOfKingsPlugin(Star):
         self.account_manager = None
         self.game_stats = None
         self.hero_query = None
+        self.group_rank = None
         self.battle_push = None
+        self.profile_history = None
+        self.cooldown = None
+        self.assets = None
+        self.render_cache = None
+        self.image_cache = None
+        self.native_renderer = None
+        self.templates = TemplateManager(
+            Path(__file__).parent / "templates",
+            minify=self.config.get("template_minify", True)
+        )
+        self.progressive = ProgressiveReply(self)
+        self.degradation = DegradationController(self)
+        self.render_scheduler = RenderScheduler(
+            self._get_int_config("render_concurrency", 2, 1),
+            self._get_int_config("render_queue_limit", 10, 0)
+        )
     
     def get_render_options(self):
         """获取统一的图片渲染配置选项"""
@@ -62,12 +98,127 @@ class GloryOfKingsPlugin(Star):
         render_scale = max(1, min(3, render_scale))
         render_quality = max(1, min(100, render_quality))
         
-        return {
+        # 负载过高时降低渲染倍率和质量
+        return self.degradation.apply({
             "full_page": True,
             "timeout": 30000,
             "device_scale_factor": render_scale,
             "quality": render_quality
-        }
+        })
+
+    async def render_template(
+        self,
+        name: str,
+        data: dict,
+        return_url: bool = True,
+        options: dict = None,
+        cache: bool = True,
+        priority: int = PRIORITY_INTERACTIVE,
+        key: str = None
+    ):
+        """
+        使用缓存的模板渲染图片
+
+        开启渲染缓存时，相同模板、数据和渲染选项的结果直接返回缓存的本地图片；
+        渲染后会被删除的图片（如推送卡片）需传入 cache=False。
+        开启远程图片缓存时，模板数据中的远程图片先替换为本地缓存。
+        实际渲染由调度器按 priority 排队，排队已满时抛出 RenderQueueFull；
+        负载降级为纯文本时抛出 RenderDegraded；
+        key 为调用方已用 render_cache_key 算好的缓存键，避免重复计算
+        """
+        if self.degradation.text_only:
+            raise RenderDegraded("负载过高，暂停图片渲染")
+        template = self.templates.get(name)
+        options = options or self.get_render_options()
+        label = name.rsplit(".", 1)[0]
+
+        async def render(return_url: bool):
+            # 配置为原生渲染的模板直接用 Pillow 绘制，失败时回退到 HTML 渲染
+            if self.native_renderer and self.native_renderer.supports(label):
+                try:
+                    return await self._render_native(label, data, options, priority)
+                except RenderQueueFull:
+                    raise
+                except Exception as e:
+                    logger.warning(f"原生渲染 {label} 失败，使用 HTML 渲染: {e}")
+
+            # 远程图片先下载到本地，渲染缓存的键仍按原地址计算
+            render_data = await self._localize_images(data)
+            return await self.render_scheduler.run(
+                label,
+                lambda: self.html_render(template, render_data, return_url=return_url, options=options),
+                priority
+            )
+
+        if not cache or self.render_cache is None:
+            return await render(return_url)
+
+        key = key or self.render_cache_key(name, data, options)
+        return await self.render_cache.get_or_render(key, lambda: render(False))
+
+    def render_cache_key(self, name: str, data: dict, options: dict) -> str:
+        """计算渲染缓存的键，内嵌的静态资源按资源标识参与计算"""
+        aliases = self.assets.source_keys if self.assets else None
+        return render_key(name, self.templates.get(name), data, options, aliases)
+
+    async def _localize_images(self, data: dict, mode: str = None) -> dict:
+        """将模板数据中的远程图片替换为本地缓存，失败时返回原数据"""
+        if not self.image_cache:
+            return data
+        try:
+            return await self.image_cache.localize(data, mode)
+        except Exception as e:
+            logger.warning(f"远程图片缓存失败，使用原地址渲染: {e}")
+            return data
+
+    async def _render_native(self, label: str, data: dict, options: dict, priority: int) -> str:
+        """使用原生渲染器绘制图片，耗时与 CPU 时间单独记录，便于和 HTML 渲染对比"""
+        native_data = await self._localize_images(data, "path")
+        path, cpu_time = await self.render_scheduler.run(
+            f"{label}.native",
+            lambda: self.native_renderer.render(label, native_data, options),
+            priority
+        )
+        metrics.observe(f"render.{label}.native_cpu", cpu_time)
+        return path
+
+    async def render_reply(self, event: AstrMessageEvent, name: str, data: dict, text: str, label: str, options: dict = None):
+        """
+        渲染图片回复，渲染失败时回退为文本
+
+        开启渐进式回复且预计渲染较慢时，先发送文本摘要，再发送图片；负载降级为纯文本时只发送文本
+        """
+        if self.degradation.text_only:
+            yield event.plain_result(text)
+            return
+
+        options = options or self.get_render_options()
+        key = self.render_cache_key(name, data, options) if self.render_cache is not None else None
+        cached = key is not None and self.render_cache.contains(key)
+        text_sent = self.progressive.should_send_text(name, cached)
+        if text_sent:
+            yield event.plain_result(f"{text}\n\n⏳ 图片生成中，请稍候...")
+
+        try:
+            url = await self.render_template(name, data, options=options, key=key)
+        except (RenderQueueFull, RenderDegraded) as e:
+            # 负载过高属于预期情况，不记录错误堆栈
+            logger.info(f"{label}暂不渲染图片，使用文本回复: {e}")
+            url = None
+        except Exception as e:
+            logger.error(f"{label}渲染图片失败，使用文本回退，错误: {e}", exc_info=True)
+            url = None
+        if url:
+            yield event.image_result(url)
+        elif not text_sent:
+            yield event.plain_result(text)
+
+    def _get_int_config(self, key: str, default: int, minimum: int) -> int:
+        """读取整数配置项"""
+        try:
+            return max(minimum, int(self.config.get(key, default)))
+        except (ValueError, TypeError):
+            return default
 
     async def initialize(self):
         """初始化插件"""
@@ -75,11 +226,42 @@ class GloryOfKingsPlugin(Star):
             logger.info("开始初始化王者荣耀插件...")
             
             self.account_manager = AccountManager(self.plugin_data_dir)
+            self.assets = AssetRegistry(
+                Path(__file__).parent,
+                self.config.get("asset_mode", "data_uri"),
+                scale=self.get_render_options()["device_scale_factor"],
+                cache_dir=Path(self.plugin_data_dir) / "asset_cache"
+            )
+            # 首次启动时生成优化后的资源可能需要数秒，放到线程中执行
+            await asyncio.to_thread(self.assets.preload)
+            cache_size = self._get_int_config("render_cache_size", 64, 0) * 1024 * 1024
+            if cache_size > 0:
+                self.render_cache = RenderCache(Path(self.plugin_data_dir) / "render_cache", cache_size)
+            image_cache_size = self._get_int_config("image_cache_size", 128, 0) * 1024 * 1024
+            if image_cache_size > 0:
+                self.image_cache = RemoteImageCache(
+                    Path(self.plugin_data_dir) / "image_cache",
+                    image_cache_size,
+                    ttl=self._get_int_config("image_cache_ttl", 7 * 86400, 0),
+                    mode=self.assets.mode
+                )
+            native_templates = self.config.get("native_render_templates", []) or []
+            if native_templates:
+                self.native_renderer = NativeRenderer(
+                    native_templates,
+                    Path(self.plugin_data_dir) / "native_render",
+                    font_path=self.config.get("native_font_path", ""),
+                    workers=self._get_int_config("native_render_workers", 2, 1)
+                )
+            self.profile_history = ProfileHistory(self.plugin_data_dir)
             self.game_stats = GameStatsQuery(self.plugin_data_dir, self)
             self.hero_query = HeroQuery(self)
+            self.group_rank = GroupRankQuery(self)
             self.battle_push = BattlePushManager(self)
+            self.cooldown = CommandCooldown(self)
             
-            self.battle_push.start(interval=60)
+            self.battle_push.start()
+            self.degradation.start()
             
             logger.info("王者荣耀插件初始化成功！")
         except Exception as e:
@@ -104,6 +286,7 @@ class GloryOfKingsPlugin(Star):
         
         user_id = event.get_sender_id()
         result = await self.account_manager.bind_id(user_id, camp_id)
+        self._remember_group_member(event)
         
         try:
             async for res in self._render_account_result(event, "绑定", camp_id, user_id):
@@ -172,6 +355,17 @@ class GloryOfKingsPlugin(Star):
             logger.error(f"账号管理页面渲染失败，使用文本回退，错误: {e}", exc_info=True)
             yield event.plain_result(result)
 
+    @filter.command("全部账号")
+    async def account_overview(self, event: AstrMessageEvent):
+        """查看所有绑定账号的概览"""
+        user_id = event.get_sender_id()
+        async for result in self.cooldown.run(
+            event, "全部账号", "all",
+            lambda: self.game_stats.get_account_overview(user_id, event),
+            group_shared=False
+        ):
+            yield result
+
     @filter.command("王者主页")
     async def homepage(self, event: AstrMessageEvent):
         """查看王者主页"""
@@ -182,7 +376,48 @@ class GloryOfKingsPlugin(Star):
             yield event.plain_result("❌ 请先绑定营地ID\n使用: 绑定营地 [ID]")
             return
         
-        async for result in self.game_stats.get_homepage(camp_id, event, user_id):
+        # 用户活跃时恢复战绩推送的正常检测频率
+        await self.battle_push.mark_active(camp_id)
+        self._remember_group_member(event)
+        
+        async for result in self.cooldown.run(
+            event, "王者主页", camp_id,
+            lambda: self.game_stats.get_homepage(camp_id, event, user_id),
+            role_id=self.account_manager.get_selected_role(user_id)
+        ):
+            yield result
+    
+    @filter.command("群排行")
+    async def group_rank_list(self, event: AstrMessageEvent):
+        """查看本群排行"""
+        group_id = event.get_group_id()
+        if not group_id:
+            yield event.plain_result("❌ 请在群聊中使用该指令")
+            return
+        
+        self._remember_group_member(event)
+        
+        async for result in self.cooldown.run(
+            event, "群排行", group_id,
+            lambda: self.group_rank.get_group_rank(group_id, event)
+        ):
+            yield result
+    
+    @filter.command("战力趋势")
+    async def power_trend(self, event: AstrMessageEvent):
+        """查看战力趋势"""
+        user_id = event.get_sender_id()
+        camp_id = self.account_manager.get_current_id(user_id)
+        
+        if not camp_id:
+            yield event.plain_result("❌ 请先绑定营地ID\n使用: 绑定营地 [ID]")
+            return
+        
+        async for result in self.cooldown.run(
+            event, "战力趋势", camp_id,
+            lambda: self.game_stats.get_power_trend(camp_id, event, user_id),
+            role_id=self.account_manager.get_selected_role(user_id)
+        ):
             yield result
     
     @filter.command("王者角色列表")
@@ -196,18 +431,15 @@ class GloryOfKingsPlugin(Star):
             return
         
         try:
-            from .core.api_service import ApiService
-            api_service = ApiService()
-            
-            # 获取用户资料
-            profile_data = await api_service.get_profile(camp_id)
+            # 获取用户资料（与王者主页共用解码后的缓存）
+            profile = await api_service.fetch_profile(camp_id)
             
-            if not profile_data or profile_data.get("result") != 0:
+            if profile.result != 0 or not profile.ok:
                 yield event.plain_result("❌ 获取角色列表失败")
                 return
             
-            profile = profile_data["data"]
-            role_list = profile.get("roleList", [])
+            role_list = profile.roles
+            self.profile_history.record_profile(camp_id, profile)
             
             if not role_list:
                 yield event.plain_result("❌ 未找到角色数据")
@@ -219,15 +451,10 @@ class GloryOfKingsPlugin(Star):
             # 构建角色列表
             lines = ["🎮 【王者角色列表】\n"]
             for i, role in enumerate(role_list, 1):
-                role_id = role.get("roleId")
-                role_name = role.get("roleName", "未知")
-                rank_name = role.get("shortRoleJobName", "未知")
-                server_name = role.get("serverName", "未知")
-                
                 # 标记当前选择的角色
-                prefix = "✅" if role_id == selected_role_id else f"{i}."
-                lines.append(f"{prefix} {role_name} ({rank_name}) - {server_name}")
-                lines.append(f"   角色ID: {role_id}\n")
+                prefix = "✅" if role.role_id == selected_role_id else f"{i}."
+                lines.append(f"{prefix} {role.role_name} ({role.short_job_name}) - {role.server_name}")
+                lines.append(f"   角色ID: {role.role_id}\n")
             
             lines.append("\n💡 使用【选择角色 序号】切换查看的角色")
             lines.append("💡 使用【清除角色选择】恢复默认角色")
@@ -257,18 +484,15 @@ class GloryOfKingsPlugin(Star):
         index = int(match.group(1)) - 1
         
         try:
-            from .core.api_service import ApiService
-            api_service = ApiService()
+            # 获取用户资料（与王者主页共用解码后的缓存）
+            profile = await api_service.fetch_profile(camp_id)
             
-            # 获取用户资料
-            profile_data = await api_service.get_profile(camp_id)
-            
-            if not profile_data or profile_data.get("result") != 0:
+            if profile.result != 0 or not profile.ok:
                 yield event.plain_result("❌ 获取角色列表失败")
                 return
             
-            profile = profile_data["data"]
-            role_list = profile.get("roleList", [])
+            role_list = profile.roles
+            self.profile_history.record_profile(camp_id, profile)
             
             if not role_list:
                 yield event.plain_result("❌ 未找到角色数据")
@@ -279,19 +503,16 @@ class GloryOfKingsPlugin(Star):
                 return
             
             selected_role = role_list[index]
-            role_id = selected_role.get("roleId")
-            role_name = selected_role.get("roleName", "未知")
-            rank_name = selected_role.get("shortRoleJobName", "未知")
-            server_name = selected_role.get("serverName", "未知")
             
             # 保存选择
-            self.account_manager.set_selected_role(user_id, role_id)
+            self.account_manager.set_selected_role(user_id, selected_role.role_id)
+            self.cooldown.invalidate(user_id=str(user_id))
             
             yield event.plain_result(
                 f"✅ 已选择角色\n\n"
-                f"👤 {role_name}\n"
-                f"🎯 {rank_name}\n"
-                f"🏠 {server_name}\n\n"
+                f"👤 {selected_role.role_name}\n"
+                f"🎯 {selected_role.short_job_name}\n"
+                f"🏠 {selected_role.server_name}\n\n"
                 f"💡 现在使用【王者主页】将查看此角色的数据"
             )
             
@@ -304,17 +525,21 @@ class GloryOfKingsPlugin(Star):
         """清除角色选择，恢复默认"""
         user_id = event.get_sender_id()
         self.account_manager.clear_selected_role(user_id)
+        self.cooldown.invalidate(user_id=str(user_id))
         yield event.plain_result("✅ 已清除角色选择\n💡 现在将使用默认角色（最常用角色）")
 
-    @filter.regex(r"[/!！]?查询战绩\s*(\d*)")
+    @filter.regex(r"[/!！]?查询战绩\s*(?:第\s*\d+\s*页|\d*)")
     async def query_battle(self, event: AstrMessageEvent):
         """查询战绩"""
         import re
         logger.info(f"收到查询战绩指令: {event.message_str}")
-        match = re.search(r"[/!！]?查询战绩\s*(\d*)", event.message_str)
+        match = re.search(r"[/!！]?查询战绩\s*(?:第\s*(\d+)\s*页|(\d*))", event.message_str)
         index = None
+        page = 1
         if match and match.group(1):
-            index = int(match.group(1))
+            page = int(match.group(1))
+        elif match and match.group(2):
+            index = int(match.group(2))
         
         user_id = event.get_sender_id()
         camp_id = self.account_manager.get_current_id(user_id)
@@ -323,7 +548,14 @@ class GloryOfKingsPlugin(Star):
             yield event.plain_result("❌ 请先绑定营地ID\n使用: 绑定营地 [ID]")
             return
         
-        async for result in self.game_stats.query_battle_stats(camp_id, event, index):
+        await self.battle_push.mark_active(camp_id)
+        self._remember_group_member(event)
+        
+        async for result in self.cooldown.run(
+            event, "查询战绩", camp_id,
+            lambda: self.game_stats.query_battle_stats(camp_id, event, index, page),
+            args=str(index) if index else f"第{page}页"
+        ):
             yield result
 
     @filter.regex(r"[/!！]?查战力\s*(.+)")
@@ -361,15 +593,13 @@ class GloryOfKingsPlugin(Star):
     @filter.command("王者帮助")
     async def show_help(self, event: AstrMessageEvent):
         """显示帮助信息"""
+        if self.degradation.text_only:
+            yield event.plain_result(HELP_TEXT)
+            return
+        
         try:
-            # 读取HTML模板
-            import os
-            template_path = os.path.join(os.path.dirname(__file__), "templates", "help.html")
-            with open(template_path, "r", encoding="utf-8") as f:
-                html_template = f.read()
-            
-            # 使用 html_render 渲染HTML模板为图片（帮助页面是静态的，不需要数据）
-            url = await self.html_render(html_template, {}, options=self.get_render_options())
+            # 渲染HTML模板为图片（帮助页面是静态的，不需要数据）
+            url = await self.render_template("help.html", {}, options=self.get_render_options())
             yield event.image_result(url)
         except Exception as e:
             logger.error(f"帮助页面渲染失败，使用文本回退，错误: {e}", exc_info=True)
@@ -386,30 +616,65 @@ class GloryOfKingsPlugin(Star):
             return
         
         # 获取群组ID（如果在群聊中）
-        group_id = getattr(event, 'group_id', None)
+        group_id = event.get_group_id() or None
         
-        result = self.battle_push.add_push_user(user_id, camp_id, group_id)
+        result = await self.battle_push.add_push_user(user_id, camp_id, group_id, event.unified_msg_origin)
         yield event.plain_result(result)
     
     @filter.command("关闭战绩推送")
     async def disable_battle_push(self, event: AstrMessageEvent):
         """关闭战绩推送"""
         user_id = event.get_sender_id()
-        group_id = getattr(event, 'group_id', None)
+        group_id = event.get_group_id() or None
         
-        result = self.battle_push.remove_push_user(user_id, group_id)
+        result = await self.battle_push.remove_push_user(user_id, group_id)
         yield event.plain_result(result)
     
     @filter.command("战绩推送状态")
     async def battle_push_status(self, event: AstrMessageEvent):
         """查看战绩推送状态"""
         user_id = event.get_sender_id()
-        result = self.battle_push.get_push_status(user_id)
+        result = await self.battle_push.get_push_status(user_id)
         yield event.plain_result(result)
+    
+    @filter.command("王者状态")
+    async def plugin_status(self, event: AstrMessageEvent):
+        """查看插件运行指标"""
+        cache_stats = api_service.get_cache_stats()
+        lines = ["📈 【插件运行状态】", ""]
+        lines.extend(self.degradation.format_lines())
+        lines.extend(metrics.format_lines())
+        lines.append(
+            f"• 缓存: 直接命中 {cache_stats['fresh']} / 后台刷新 {cache_stats['revalidate']} / "
+            f"未命中 {cache_stats['miss']} / 故障回退 {cache_stats['fallback']}"
+        )
+        if self.render_cache:
+            render_stats = self.render_cache.stats()
+            lines.append(
+                f"• 渲染缓存: {render_stats['count']} 张 / {render_stats['size'] / 1024 / 1024:.1f} MB / "
+                f"命中率 {render_stats['hit_rate']:.0%}"
+            )
+        if self.image_cache:
+            image_stats = self.image_cache.stats()
+            lines.append(
+                f"• 图片缓存: {image_stats['count']} 张 / {image_stats['size'] / 1024 / 1024:.1f} MB / "
+                f"命中率 {image_stats['hit_rate']:.0%}"
+            )
+        scheduler_stats = self.render_scheduler.stats()
+        lines.append(
+            f"• 渲染队列: 进行中 {scheduler_stats['active']}/{scheduler_stats['max_concurrency']} / "
+            f"排队 {scheduler_stats['queued']}"
+        )
+        yield event.plain_result("\n".join(lines))
+
+    def _remember_group_member(self, event: AstrMessageEvent):
+        """记录在群内使用过插件的用户，供群排行使用"""
+        group_id = event.get_group_id()
+        if group_id:
+            self.account_manager.add_group_member(group_id, event.get_sender_id())
 
     async def _render_account_result(self, event, operation_type, camp_id, user_id):
         """渲染账号管理结果页面"""
-        import os
         from datetime import datetime
         
         id_list_str = await self.account_manager.get_id_list(user_id)
@@ -427,14 +692,20 @@ class GloryOfKingsPlugin(Star):
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        template_path = os.path.join(os.path.dirname(__file__), "templates", "account_manage.html")
-        with open(template_path, "r", encoding="utf-8") as f:
-            html_template = f.read()
-        
-        url = await self.html_render(html_template, template_data, options=self.get_render_options())
+        # 页面包含操作时间，每次内容都不同，不写入渲染缓存
+        url = await self.render_template(
+            "account_manage.html", template_data, options=self.get_render_options(), cache=False
+        )
         yield event.image_result(url)
 
     async def terminate(self):
         """插件卸载时调用"""
         self.battle_push.stop()
+        self.degradation.stop()
+        if self.profile_history:
+            self.profile_history.flush()
+        if self.native_renderer:
+            self.native_renderer.shutdown()
+        if self.image_cache:
+            await self.image_cache.close()
         logger.info("王者荣耀插件已关闭")